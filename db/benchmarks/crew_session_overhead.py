@@ -0,0 +1,86 @@
+"""Per-turn framework overhead of the chatbot: fresh crew per turn vs. a reused CrewSession.
+
+The LLM is replaced by a stub that answers instantly, so the timings are
+only agent/task/crew construction, prompt assembly and kickoff plumbing.
+
+    cd db
+    python benchmarks/crew_session_overhead.py --turns 50
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('CREWAI_DISABLE_TELEMETRY', 'true')
+os.environ.setdefault('OTEL_SDK_DISABLED', 'true')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from crewai import Agent, Crew, Task
+from crewai.llms.base_llm import BaseLLM
+from docrag.session import ANSWER_EXPECTED_OUTPUT, CrewSession
+
+
+class InstantLLM(BaseLLM):
+    def call(self, messages, *args, **kwargs):
+        return "Final Answer: The cat API returns JSON."
+
+
+def create_agent(llm):
+    return Agent(
+        role='Documentation Expert',
+        goal='Answer questions about documentation accurately',
+        backstory='I am an expert at understanding and explaining documentation',
+        llm=llm
+    )
+
+
+def fresh_crew_turn(llm, query, context, history):
+    task = Task(
+        description=f"""
+            Answer the following question using the provided context.
+            Question: {query}
+            
+            Context:
+            {context}
+            
+            Previous conversation:
+            {history}
+            """,
+        expected_output=ANSWER_EXPECTED_OUTPUT,
+        agent=create_agent(llm)
+    )
+    crew = Crew(agents=[task.agent], tasks=[task])
+    return crew.kickoff()
+
+
+def measure(label, turn, turns):
+    turn(0)  # warm-up
+    timings = []
+    for i in range(1, turns + 1):
+        start = time.perf_counter()
+        turn(i)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    print(f"{label:<22} mean {mean * 1000:8.2f} ms   p50 {timings[len(timings) // 2] * 1000:8.2f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=50)
+    args = parser.parse_args()
+
+    llm = InstantLLM(model='instant')
+    context = "From Authentication:\nSend your API key in the x-api-key header. " * 20
+    history = "Human: How do I list breeds?\nAssistant: Call GET /v1/breeds.\n"
+
+    measure("fresh crew per turn", lambda i: fresh_crew_turn(llm, f"Question {i}?", context, history), args.turns)
+
+    session = CrewSession(create_agent(llm))
+    measure("reused CrewSession", lambda i: session.answer(f"Question {i}?", context, history), args.turns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Pages per second of each HTML parser backend, on saved pages or synthetic documentation pages.
+
+Every backend extracts the title, main-content blocks and links the
+crawler uses; 'beautifulsoup' is the original tree walk. Reported per
+backend are pages/s, MB/s and the share of pages whose extracted
+content matches the first backend's.
+
+    cd db
+    wget --recursive --level 2 --accept html --directory-prefix fixtures https://docs.python.org/3/
+    python benchmarks/html_parsing.py --fixtures fixtures
+    python benchmarks/html_parsing.py                # 200 synthetic Sphinx-style pages
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag.parsing import PARSERS, available_parsers
+
+
+def make_page(rng, n_sections=12):
+    words = [f"word{i}" for i in range(2000)]
+
+    def sentence():
+        return ' '.join(rng.choice(words, size=int(rng.integers(6, 18)))).capitalize() + '.'
+
+    nav = ''.join(f'<li class="toctree-l1"><a class="reference internal" href="/docs/page{i}.html">Page {i}</a></li>'
+                  for i in rng.integers(0, 500, size=80))
+    sections = []
+    for s in range(n_sections):
+        paragraphs = ''.join(f"<p>{sentence()} <code class=\"literal\">{rng.choice(words)}()</code> {sentence()} "
+                             f"<a href=\"#s{s}\">{rng.choice(words)}</a> {sentence()}</p>" for _ in range(4))
+        code = '\n'.join(f"&gt;&gt;&gt; {rng.choice(words)}({rng.choice(words)})" for _ in range(6))
+        items = ''.join(f"<li><p>{sentence()}</p></li>" for _ in range(5))
+        sections.append(f'<section id="s{s}"><h2>{sentence()}<a class="headerlink" href="#s{s}">¶</a></h2>'
+                        f'{paragraphs}<div class="highlight"><pre>{code}</pre></div><ul>{items}</ul></section>')
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{sentence()} — Docs</title>'
+            f'<link rel="stylesheet" href="/_static/style.css"><script>var DOCUMENTATION_OPTIONS = {{}};</script>'
+            f'</head><body><div class="sphinxsidebar"><ul>{nav}</ul></div>'
+            f'<div class="document"><div class="body" role="main">{"".join(sections)}</div></div>'
+            f'<footer><a href="/copyright.html">Copyright</a></footer></body></html>')
+
+
+def load_fixtures(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '**', '*.htm*'), recursive=True)):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', help="directory of saved .html pages (searched recursively)")
+    parser.add_argument('--pages', type=int, default=200, help="synthetic pages when --fixtures is not given")
+    parser.add_argument('--parsers', nargs='+', default=available_parsers(), choices=list(PARSERS))
+    parser.add_argument('--repeat', type=int, default=3, help="best of this many passes over the pages")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        pages = load_fixtures(args.fixtures)
+    else:
+        rng = np.random.default_rng(0)
+        pages = [make_page(rng) for _ in range(args.pages)]
+    megabytes = sum(len(page.encode('utf-8')) for page in pages) / 1e6
+    print(f"{len(pages)} pages, {megabytes:.1f} MB")
+
+    reference = None
+    for name in args.parsers:
+        parse = PARSERS[name]
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = [parse(page) for page in pages]
+            best = min(best, time.perf_counter() - start)
+        if reference is None:
+            reference = results
+        same = sum(result == expected for result, expected in zip(results, reference)) / len(pages)
+        print(f"{name:<14} {len(pages) / best:8.1f} pages/s   {megabytes / best:6.2f} MB/s   "
+              f"same as {args.parsers[0]}: {same:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
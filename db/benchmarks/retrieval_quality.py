@@ -0,0 +1,99 @@
+"""Recall@k and search latency of TF-IDF, BM25 and hybrid (BM25 + LSA embeddings) retrieval.
+
+The corpus is synthetic: each topic draws its vocabulary from a shared
+word pool, so single words are ambiguous across topics, and each chunk
+mixes words of one topic with common filler. Each query targets one
+chunk: a few of its words plus words of the same topic that the chunk
+does not contain. Reported are recall@k of the target chunk and the
+share of the top k on the query's topic.
+
+    cd db
+    python benchmarks/retrieval_quality.py --chunks 100000 --queries 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag.index import InvertedIndex
+from docrag.retrieval import HybridRetriever
+
+
+def make_corpus(n_chunks, n_topics, rng, pool_size=6000):
+    pool = [f"w{word}" for word in range(pool_size)]
+    topic_words = [list(rng.choice(pool, size=300, replace=False)) for _ in range(n_topics)]
+    common_words = [f"common{word}" for word in range(300)]
+    chunk_topics = rng.integers(0, n_topics, size=n_chunks)
+    chunks = []
+    for topic in chunk_topics:
+        words = list(rng.choice(topic_words[topic], size=25)) + list(rng.choice(common_words, size=15))
+        rng.shuffle(words)
+        chunks.append(' '.join(words))
+    return chunks, chunk_topics, topic_words
+
+
+def make_queries(chunks, chunk_topics, topic_words, n_queries, rng):
+    queries = []
+    for target in rng.choice(len(chunks), size=n_queries, replace=False):
+        present = set(chunks[target].split())
+        exact = list(rng.choice(sorted(w for w in present if not w.startswith('common')), size=2, replace=False))
+        related = [w for w in topic_words[chunk_topics[target]] if w not in present]
+        queries.append((' '.join(exact + list(rng.choice(related, size=3, replace=False))), target))
+    return queries
+
+
+def evaluate(label, search, queries, chunk_topics, k):
+    search(queries[0][0])  # warm-up
+    hits, on_topic, timings = 0, 0, []
+    for query, target in queries:
+        start = time.perf_counter()
+        found = search(query)
+        timings.append(time.perf_counter() - start)
+        hits += target in found
+        on_topic += sum(chunk_topics[idx] == chunk_topics[target] for idx in found)
+    timings.sort()
+    print(f"{label:<8} recall@{k} {hits / len(queries):6.3f}   on-topic@{k} {on_topic / (k * len(queries)):6.3f}   "
+          f"p50 {timings[len(timings) // 2] * 1000:6.2f} ms   p95 {timings[int(len(timings) * 0.95) - 1] * 1000:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=100000)
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--embedder', default='lsa')
+    parser.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    chunks, chunk_topics, topic_words = make_corpus(args.chunks, args.topics, rng)
+    queries = make_queries(chunks, chunk_topics, topic_words, args.queries, rng)
+
+    vectorizer = TfidfVectorizer()
+    vectors = vectorizer.fit_transform(chunks).tocsr()
+    index = InvertedIndex(vectors)
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        retriever = HybridRetriever.build(os.path.join(directory, 'retrieval'), chunks, vectorizer, vectors,
+                                          args.embedder)
+        print(f"built BM25 + {args.embedder} IVF index over {len(chunks)} chunks in "
+              f"{time.perf_counter() - start:.1f} s")
+
+        k = args.k
+        evaluate("tf-idf", lambda q: index.top_k(vectorizer.transform([q]), k)[0].tolist(),
+                 queries, chunk_topics, k)
+        evaluate("bm25", lambda q: retriever.bm25.search(q, k)[0].tolist(), queries, chunk_topics, k)
+        evaluate("dense", lambda q: retriever.ann.search(retriever.embedder.embed([q])[0], k)[0].tolist(),
+                 queries, chunk_topics, k)
+        evaluate("hybrid", lambda q: [idx for idx, _, _ in retriever.search(q, k)], queries, chunk_topics, k)
+
+
+if __name__ == "__main__":
+    main()
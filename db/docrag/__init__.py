@@ -0,0 +1,5 @@
+from .chunking import Chunker
+from .crawler import DocumentationCrawler
+from .index import InvertedIndex
+
+__all__ = ['Chunker', 'DocumentationCrawler', 'InvertedIndex']
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+import json
+import os
+import queue
+import time
+from .memory import ConversationMemory
+from .session import CrewSession, NO_RESULTS_MESSAGE
+from .transcript import TranscriptLog, read_transcript
+
+
+def read_questions(path: str) -> List[Dict]:
+    """Questions from a text file (one per line, '#' comments) or JSONL with a 'question' field"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.endswith('.jsonl'):
+                entry = json.loads(line)
+                questions.append({'id': entry.get('id', line_number), 'question': entry['question']})
+            else:
+                questions.append({'id': line_number, 'question': line})
+    return questions
+
+
+def run_batch(chatbot, questions: List[Dict], output_path: str, concurrency: int = 4, k: int = 5,
+              retrieval_batch_size: int = 256):
+    """Answer `questions` and append one JSON line per answer to `output_path`.
+
+    Retrieval runs ahead in batches through chatbot.search_many when the
+    chatbot has it (one sparse matrix product per batch), else one search
+    per question. Generations run on `concurrency` threads, each with its
+    own CrewSession, and every question starts with an empty history.
+    Questions already answered in `output_path` are skipped, so an
+    interrupted run can simply be restarted. A question whose generation
+    failed is written with an 'error' field instead of an answer and is
+    asked again on the next run.
+    """
+    done = set()
+    if os.path.exists(output_path):
+        done = {entry['question'] for entry in read_transcript(output_path) if 'error' not in entry}
+    pending = [entry for entry in questions if entry['question'] not in done]
+    if done:
+        print(f"Skipping {len(questions) - len(pending)} questions already in {output_path}")
+    if not pending:
+        return
+
+    crew_sessions = queue.Queue()
+    for _ in range(concurrency):
+        crew_sessions.put(CrewSession(chatbot.create_agents()))
+
+    def answer(entry: Dict, results: List[Dict]) -> Dict:
+        started = time.perf_counter()
+        relevant = [result for result in results if result['relevance_score'] > 0.1]
+        response, error = None, None
+        try:
+            if not relevant:
+                response = NO_RESULTS_MESSAGE
+            else:
+                crew_session = crew_sessions.get()
+                try:
+                    response = chatbot.generate_response(entry['question'], results, memory=ConversationMemory(),
+                                                         crew_session=crew_session, raise_errors=True)
+                finally:
+                    crew_sessions.put(crew_session)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            end_request = getattr(chatbot, 'end_request', None)
+            if end_request:
+                end_request()
+        row = {
+            'id': entry['id'],
+            'question': entry['question'],
+            'answer': str(response) if error is None else None,
+            'sources': [
+                {'title': result['title'], 'url': result['url'], 'relevance_score': result['relevance_score']}
+                for result in relevant[:3]
+            ],
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        if error is not None:
+            row['error'] = error
+        return row
+
+    output = TranscriptLog(output_path)
+    started = time.perf_counter()
+    answered = 0
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = []
+            for start in range(0, len(pending), retrieval_batch_size):
+                batch = pending[start:start + retrieval_batch_size]
+                texts = [entry['question'] for entry in batch]
+                if hasattr(chatbot, 'search_many'):
+                    batch_results = chatbot.search_many(texts, k)
+                else:
+                    batch_results = [chatbot.search(text, k) for text in texts]
+                futures.extend(executor.submit(answer, entry, results)
+                               for entry, results in zip(batch, batch_results))
+
+            for future in as_completed(futures):
+                row = future.result()
+                output.append(row)
+                answered += 1
+                failed += 'error' in row
+                if answered % 10 == 0 or answered == len(pending):
+                    per_minute = answered / (time.perf_counter() - started) * 60
+                    print(f"Answered {answered}/{len(pending)} ({per_minute:.1f} questions/min)")
+    finally:
+        output.close()
+    if failed:
+        print(f"{failed} questions failed and are marked with 'error' in {output_path}; run again to retry them")
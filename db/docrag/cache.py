@@ -0,0 +1,119 @@
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip('?!. ')
+
+
+def chunk_key(result: Dict) -> str:
+    """Content-derived id of a search result, stable across index rebuilds"""
+    return hashlib.sha1(f"{result['url']}\0{result['content']}".encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM answers.
+
+    An answer is reused when the normalized question, the retrieved chunks
+    and the conversation history window all match. With
+    `similarity_threshold` set, a question that differs in wording is also
+    a hit if its TF-IDF vector has at least that cosine similarity to a
+    cached question asked against the same chunks and history.
+
+    Entries expire after `ttl_seconds`; beyond `max_entries` the least
+    recently used are evicted.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600, max_entries: int = 1000,
+                 similarity_threshold: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                context_key TEXT NOT NULL,
+                query TEXT NOT NULL,
+                query_vector TEXT,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_responses_context ON responses (context_key);
+            CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses (last_used);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _keys(query: str, chunk_ids: List[str], history: str):
+        context_key = hashlib.sha1(json.dumps([chunk_ids, history]).encode('utf-8')).hexdigest()
+        key = hashlib.sha1(f"{context_key}\0{normalize_query(query)}".encode('utf-8')).hexdigest()
+        return key, context_key
+
+    @staticmethod
+    def _vector_to_json(query_vector) -> Optional[str]:
+        if query_vector is None:
+            return None
+        return json.dumps({str(int(col)): float(weight) for col, weight in zip(query_vector.indices, query_vector.data)})
+
+    def get(self, query: str, chunk_ids: List[str], history: str, query_vector=None) -> Optional[str]:
+        """Return a cached answer or None"""
+        key, context_key = self._keys(query, chunk_ids, history)
+        now = time.time()
+        oldest = now - self.ttl_seconds
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, response FROM responses WHERE key = ? AND created_at >= ?", (key, oldest)
+            ).fetchone()
+
+            if row is None and self.similarity_threshold is not None and query_vector is not None:
+                query_weights = dict(zip(query_vector.indices.tolist(), query_vector.data.tolist()))
+                best = 0.0
+                for candidate_key, candidate_vector, response in self._conn.execute(
+                    "SELECT key, query_vector, response FROM responses "
+                    "WHERE context_key = ? AND created_at >= ? AND query_vector IS NOT NULL",
+                    (context_key, oldest)
+                ):
+                    # TF-IDF rows are L2-normalised, so the dot product is the cosine
+                    weights = json.loads(candidate_vector)
+                    similarity = sum(w * weights.get(str(col), 0.0) for col, w in query_weights.items())
+                    if similarity >= self.similarity_threshold and similarity > best:
+                        best, row = similarity, (candidate_key, response)
+
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, row[0]))
+            self._conn.commit()
+            return row[1]
+
+    def put(self, query: str, chunk_ids: List[str], history: str, response: str, query_vector=None):
+        """Store an answer and apply TTL/LRU eviction"""
+        key, context_key = self._keys(query, chunk_ids, history)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, context_key, query, self._vector_to_json(query_vector), response, now, now)
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
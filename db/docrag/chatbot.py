@@ -0,0 +1,416 @@
+from datetime import datetime
+from typing import Callable, Dict, List
+import json
+import os
+import time
+import numpy as np
+from crewai import Agent, LLM
+from sklearn.feature_extraction.text import TfidfVectorizer
+from .cache import ResponseCache, chunk_key
+from .cli import argument_parser, chatbot_options, documentation_url, run
+from .context import ContextBuilder
+from .crawler import DocumentationCrawler
+from .index import InvertedIndex
+from .memory import ConversationMemory, llm_summarizer
+from .metrics import Metrics, llm_token_counts
+from .refresh import apply_crawl_changes
+from .retrieval import HybridRetriever
+from .session import CrewSession, NO_RESULTS_MESSAGE
+from .storage import load_knowledge_base
+from .store import (FileStore, deduplicate_chunks, default_checkpoint_path, default_store_spec, obtain_corpus,
+                    open_store, site_slug, store_home)
+from .transcript import TranscriptLog
+
+
+class BaseChatbot:
+    """Answer generation and the terminal chat loop shared by the chatbot front ends.
+
+    Subclasses own the knowledge base: they implement
+    initialize_knowledge_base() and search(), and set `vectorizer` once the
+    knowledge base is loaded. `_record_turn` is where a subclass persists a
+    turn of the terminal chat besides keeping it in `memory`.
+    """
+
+    def __init__(self, base_url: str, response_cache: ResponseCache = None, stream: bool = True,
+                 metrics: Metrics = None, context_builder: ContextBuilder = None,
+                 memory: ConversationMemory = None):
+        self.stream = stream
+        self.llm = self._create_llm()
+
+        # Long crawls checkpoint their progress and resume after a restart
+        self.crawler = DocumentationCrawler(base_url, checkpoint=default_checkpoint_path(base_url))
+        self.vectorizer = None
+        self.base_url = base_url
+        self.response_cache = response_cache
+        self.crew_session = None
+        self.metrics = metrics or Metrics(enabled=False)
+        self.context_builder = context_builder or ContextBuilder()
+        # Not `memory or ...`: a memory with no turns yet is falsy
+        self.memory = memory if memory is not None else ConversationMemory()
+
+    def _create_llm(self):
+        return LLM(
+            model="ollama/llama3.2:1b",
+            base_url="http://localhost:11434",
+            stream=self.stream
+        )
+
+    def create_agents(self):
+        return Agent(
+            role='Documentation Expert',
+            goal='Answer questions about documentation accurately',
+            backstory='I am an expert at understanding and explaining documentation',
+            # An LLM of its own, so the token usage it counts is only that of this agent's calls
+            llm=self._create_llm()
+        )
+
+    def generate_response(self, query: str, search_results: List[Dict], on_token: Callable[[str], None] = None,
+                          memory: ConversationMemory = None, crew_session: CrewSession = None,
+                          raise_errors: bool = False) -> str:
+        """Answer from search results; `memory` and `crew_session` let callers such as the server own them.
+
+        A failed generation returns an apology, or raises with `raise_errors`
+        for callers such as batch runs that must tell it from an answer.
+        """
+        if memory is None:
+            memory = self.memory
+        with self.metrics.stage('build_context'):
+            # Best distinct chunks and the recent turns that fit the prompt budget
+            context, history_text, used_results = self.context_builder.build(
+                search_results, memory.turns(), memory.summary
+            )
+
+        # Reuse an earlier answer for the same question, sources and history
+        if self.response_cache:
+            with self.metrics.stage('cache_lookup'):
+                chunk_ids = [chunk_key(result) for result in used_results]
+                query_vector = self.vectorizer.transform([query])
+                cached = self.response_cache.get(query, chunk_ids, history_text, query_vector)
+            if cached is not None:
+                self.metrics.inc('cache_hits_total')
+                return cached
+
+        try:
+            if crew_session is None:
+                # Built on the first turn, then reused for the rest of the session
+                if self.crew_session is None:
+                    self.crew_session = CrewSession(self.create_agents())
+                crew_session = self.crew_session
+            # The LLM counts usage over its lifetime; this call's share is the difference
+            usage_before = crew_session.agent.llm.get_token_usage_summary()
+            with self.metrics.stage('llm'):
+                response = crew_session.answer(query, context, history_text, on_token=on_token)
+            self.metrics.inc('llm_calls_total')
+            self.metrics.record_tokens(*llm_token_counts(response, crew_session.task.description, usage_before))
+            if self.response_cache:
+                self.response_cache.put(query, chunk_ids, history_text, str(response), query_vector)
+            return response
+        except Exception:
+            if raise_errors:
+                raise
+            return f"I apologize, but I couldn't generate a proper response. This might be because I couldn't find relevant information in the documentation. Could you please rephrase your question or ask about a different topic?"
+
+    def _record_turn(self, question: str, answer: str, sources: List[Dict]):
+        """Keep a turn of the terminal chat; `memory` logs it to its transcript, if it has one"""
+        self.memory.add(question, answer, timestamp=datetime.now().isoformat())
+
+    def save_chat_history(self):
+        """Force the transcript to disk; turns are appended to it as they happen"""
+        transcript = self.memory.transcript
+        if transcript is None or not len(self.memory):
+            return
+
+        transcript.sync()
+        print(f"\nChat history saved to {transcript.path}")
+
+    def _print_sources(self, results: List[Dict]):
+        print("\nSources:")
+        for result in results[:3]:  # Show top 3 sources
+            if result['relevance_score'] > 0.1:
+                print(f"- {result['title']}: {result['url']}")
+
+    def _stream_response(self, query: str, results: List[Dict]):
+        """Print the answer as tokens arrive; falls back to printing it whole"""
+        print("\nAssistant: ", end='', flush=True)
+        streamed = []
+
+        def print_token(token: str):
+            streamed.append(token)
+            print(token, end='', flush=True)
+
+        response = self.generate_response(query, results, on_token=print_token)
+        # Cached answers and non-streaming LLMs produce no tokens
+        print("" if streamed else response)
+        return response
+
+    def chat_loop(self):
+        print("\nWelcome to the Documentation Chatbot!")
+        print("Ask any questions about the documentation. Type 'exit' to end the conversation.")
+        if self.memory.transcript is not None:
+            print("Type 'save' to save the chat history.")
+        print("\nNote: I'm currently processing documentation from:", self.base_url)
+        print("Please ask questions related to this documentation.\n")
+
+        while True:
+            try:
+                query = input("\nYou: ").strip()
+
+                if query.lower() == 'exit':
+                    self.save_chat_history()
+                    print("\nGoodbye!")
+                    break
+
+                if query.lower() == 'save':
+                    self.save_chat_history()
+                    continue
+
+                if not query:
+                    continue
+
+                # Search relevant content
+                request_started = time.perf_counter()
+                results = self.search(query)
+
+                if not any(result['relevance_score'] > 0.1 for result in results):
+                    print(f"\n{NO_RESULTS_MESSAGE}")
+                    continue
+
+                if self.stream:
+                    # Sources are known before the LLM starts, show them while it generates
+                    self._print_sources(results)
+                    response = self._stream_response(query, results)
+                else:
+                    response = self.generate_response(query, results)
+
+                self._record_turn(query, str(response), results)
+
+                if not self.stream:
+                    # Print response with source references
+                    print("\nAssistant:", response)
+                    self._print_sources(results)
+
+                self.metrics.observe_stage('request', time.perf_counter() - request_started)
+                self.metrics.inc('requests_total')
+                self.metrics.flush()
+
+            except KeyboardInterrupt:
+                print("\n\nInterrupted by user.")
+                self.save_chat_history()
+                break
+            except Exception as e:
+                print(f"\nError: {str(e)}")
+                print("Please try again with a different question.")
+
+
+# Need R&D on CHROMA and GPT Embedding Text Embedding
+class DocumentationChatbot(BaseChatbot):
+    """Chatbot over a knowledge base in a docrag.store store, searched in memory"""
+
+    def __init__(self, base_url: str, response_cache: ResponseCache = None, stream: bool = True,
+                 metrics: Metrics = None, context_builder: ContextBuilder = None,
+                 memory: ConversationMemory = None, hybrid_embedder: str = None, store=None):
+        super().__init__(base_url, response_cache=response_cache, stream=stream, metrics=metrics,
+                         context_builder=context_builder, memory=memory)
+        self.vectors = None
+        self.index = None
+        self.chunks = []
+        self.chunk_metadata = []
+        self.page_state = {}
+        self.kb_created_at = None
+        # Where the crawled and vectorized knowledge base lives; by default shared with the other front ends
+        self.store = store or open_store(default_store_spec(base_url))
+        # Embedder spec for BM25 + dense retrieval; plain TF-IDF search when None
+        self.hybrid_embedder = hybrid_embedder
+        self.retriever = None
+
+    def initialize_knowledge_base(self, refresh: bool = False):
+        """Initialize, load or incrementally refresh knowledge base"""
+        # Knowledge bases from before the shared store sit in the working directory; older
+        # copies of the JSON file were written without the ':' that Windows refuses in names
+        local_kb_dir = f"knowledge_base_{self.base_url.replace('/', '_')}"
+        legacy_kb_files = [f"{local_kb_dir}.json", f"{local_kb_dir.replace(':', '')}.json"]
+        legacy_kb_file = next((filename for filename in legacy_kb_files if os.path.exists(filename)), None)
+
+        if self.store.exists() and refresh:
+            print("Refreshing knowledge base...")
+            self.refresh_knowledge_base()
+        elif self.store.exists():
+            print(f"Loading existing knowledge base from {self.store!r}...")
+            self.load_knowledge_base()
+        elif os.path.isdir(local_kb_dir):
+            print(f"Moving knowledge base {local_kb_dir} to {self.store!r}...")
+            self._use_knowledge_base(load_knowledge_base(local_kb_dir))
+            self.save_knowledge_base()
+        elif legacy_kb_file:
+            print("Converting legacy JSON knowledge base...")
+            self._load_legacy_knowledge_base(legacy_kb_file)
+            self.save_knowledge_base()
+        else:
+            # Crawls and vectorizes the site into the store
+            obtain_corpus(self.base_url, self.crawler, self.store)
+            self.load_knowledge_base()
+
+        if self.hybrid_embedder and len(self.chunks):
+            self._load_hybrid_retriever()
+
+        self.metrics.set_gauge('corpus_chunks', len(self.chunks))
+        self.metrics.set_gauge('vocabulary_terms', len(self.vectorizer.vocabulary_))
+        print(f"Knowledge base ready with {len(self.chunks)} chunks from {len(self.crawler.content_store)} pages")
+
+    def _load_hybrid_retriever(self):
+        """Open the BM25 and embedding indexes of this knowledge base, rebuilding them if stale"""
+        if isinstance(self.store, FileStore):
+            retrieval_dir = f"{self.store.directory}_retrieval"
+        else:
+            retrieval_dir = os.path.join(store_home(), f"retrieval_{site_slug(self.base_url)}")
+
+        if HybridRetriever.is_current(retrieval_dir, self.hybrid_embedder, len(self.chunks), self.kb_created_at):
+            self.retriever = HybridRetriever.load(retrieval_dir, self.vectorizer)
+        else:
+            print(f"Building hybrid retrieval index ({self.hybrid_embedder})...")
+            self.retriever = HybridRetriever.build(retrieval_dir, self.chunks, self.vectorizer, self.vectors,
+                                                   self.hybrid_embedder, self.kb_created_at)
+
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        if self.retriever is not None:
+            return self._hybrid_search(query, k)
+
+        with self.metrics.stage('vectorize_query'):
+            query_vector = self.vectorizer.transform([query])
+        with self.metrics.stage('score'):
+            top_k_indices, scores = self.index.top_k(query_vector, k)
+
+        with self.metrics.stage('fetch_results'):
+            return self._results(top_k_indices, scores)
+
+    def search_many(self, queries: List[str], k: int = 5) -> List[List[Dict]]:
+        """search() for many queries; TF-IDF scores come from one sparse matrix product"""
+        if self.retriever is not None:
+            return [self._hybrid_search(query, k) for query in queries]
+
+        query_vectors = self.vectorizer.transform(queries)
+        return [self._results(top_k_indices, scores)
+                for top_k_indices, scores in self.index.top_k_many(query_vectors, k)]
+
+    def _results(self, top_k_indices, scores) -> List[Dict]:
+        results = []
+        for idx, score in zip(top_k_indices, scores):
+            results.append({
+                'content': self.chunks[idx],
+                'url': self.chunk_metadata[idx]['url'],
+                'title': self.chunk_metadata[idx]['title'],
+                'relevance_score': float(score)
+            })
+        return results
+
+    def _hybrid_search(self, query: str, k: int) -> List[Dict]:
+        """Results in fused rank order; relevance_score is the better of TF-IDF and embedding similarity"""
+        with self.metrics.stage('score'):
+            hits = self.retriever.search(query, k)
+
+        with self.metrics.stage('fetch_results'):
+            query_vector = self.vectorizer.transform([query])
+            results = []
+            for idx, fused_score, similarity in hits:
+                lexical = self.vectors[idx].multiply(query_vector).sum()
+                results.append({
+                    'content': self.chunks[idx],
+                    'url': self.chunk_metadata[idx]['url'],
+                    'title': self.chunk_metadata[idx]['title'],
+                    'relevance_score': max(float(lexical), float(similarity)),
+                    'fused_score': fused_score
+                })
+
+        return results
+
+    def save_knowledge_base(self):
+        """Write the knowledge base to the store, one copy of each distinct chunk, and serve it from there"""
+        chunks, chunk_metadata, vectors, duplicates = deduplicate_chunks(self.chunks, self.chunk_metadata,
+                                                                         self.vectors)
+        if duplicates:
+            print(f"Dropped {duplicates} duplicate chunks")
+        self.store.save({
+            'chunks': chunks,
+            'metadata': chunk_metadata,
+            'vectorizer': self.vectorizer,
+            'vectors': vectors,
+            'page_state': self.page_state,
+            'meta': {'created_at': datetime.now().isoformat()}
+        })
+        self.load_knowledge_base()
+
+    def load_knowledge_base(self):
+        """Load the knowledge base from the store (memory-mapped for file stores); nothing is re-vectorized"""
+        self._use_knowledge_base(self.store.load())
+
+    def _use_knowledge_base(self, data: Dict):
+        self.chunks = data['chunks']
+        self.chunk_metadata = data['metadata']
+        self.vectorizer = data['vectorizer']
+        self.vectors = data['vectors']
+        self.index = InvertedIndex(data['postings'])
+        self.page_state = data['page_state']
+        self.kb_created_at = data['meta']['created_at']
+
+    def refresh_knowledge_base(self):
+        """Re-crawl with conditional GETs and re-index only pages that changed"""
+        self.load_knowledge_base()
+        self.crawler.page_state = dict(self.page_state)
+        self.crawler.crawl(self.base_url)
+
+        self.chunks, self.chunk_metadata, self.vectors, stats = apply_crawl_changes(
+            self.chunks, self.chunk_metadata, self.vectors, self.vectorizer, self.crawler
+        )
+        self.page_state = self.crawler.page_state
+        self.save_knowledge_base()
+        self.crawler.discard_checkpoint()
+
+        print(f"Refreshed: {stats['changed']} changed, {stats['unchanged']} unchanged, {stats['removed']} removed pages")
+
+    def _load_legacy_knowledge_base(self, filename: str):
+        """Load the old single-file JSON format so it can be converted"""
+        with open(filename, 'r') as f:
+            data = json.load(f)
+
+        self.chunks = data['chunks']
+        self.chunk_metadata = data['metadata']
+
+        self.vectorizer = TfidfVectorizer()
+        self.vectorizer.vocabulary_ = data['vectorizer']
+        self.vectorizer.idf_ = np.array(data['idf'])
+
+        self.vectors = self.vectorizer.transform(self.chunks)
+        self.index = InvertedIndex(self.vectors)
+
+
+def main():
+    """Front end of the JSON-store chatbot: website-RAG-search-json.py and heraVai/CrewRAG_Demo1.py"""
+    parser = argument_parser("Chat with a documentation website")
+    parser.add_argument('--refresh', action='store_true',
+                        help="re-crawl changed pages and update an existing knowledge base")
+    parser.add_argument('--store', metavar='SPEC',
+                        help="where the knowledge base lives: file:<dir>, sqlite:<path> or a postgresql:// URL "
+                             "(default: the file store shared by all front ends, under $DOCRAG_HOME)")
+    parser.add_argument('--hybrid', nargs='?', const='lsa', metavar='EMBEDDER',
+                        help="fuse BM25 with dense retrieval; EMBEDDER is 'lsa[:dims]' (default) "
+                             "or 'st:<sentence-transformers model>'")
+    args = parser.parse_args()
+    url = documentation_url(args)
+
+    # Every turn is appended here as it happens; `python -m docrag.transcript` compacts or exports it
+    transcript = TranscriptLog(f"chat_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    memory = ConversationMemory(max_recent=args.history_turns, transcript=transcript)
+
+    chatbot = DocumentationChatbot(url, memory=memory, hybrid_embedder=args.hybrid,
+                                   store=open_store(args.store) if args.store else None,
+                                   **chatbot_options(args, url))
+    if args.summarize_with_llm:
+        memory.summarizer = llm_summarizer(chatbot.llm)
+
+    print("\nPreparing knowledge base...")
+    chatbot.initialize_knowledge_base(refresh=args.refresh)
+
+    try:
+        run(chatbot, args, transcript=transcript)
+    finally:
+        transcript.close()
@@ -0,0 +1,120 @@
+from typing import Dict, Iterable, Optional
+import json
+import os
+import sqlite3
+
+
+class CrawlCheckpoint:
+    """Progress of one crawl in SQLite, so a crawl that dies can pick up where it stopped.
+
+    `urls` holds every URL the crawl has queued, in discovery order, and
+    whether it is done: fetched, skipped or known to be an alias of
+    another page. `pages` holds the page data and state of every page with
+    a result. A URL that was in flight when the process died is not done,
+    so a resumed crawl fetches it again.
+
+    Only the crawl loop's thread writes; rows written since the last
+    `commit` are lost on a crash and their URLs fetched again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+        self._sequence = 0
+
+    def __repr__(self):
+        return f"CrawlCheckpoint({self.path!r})"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # A power cut may lose the last commits but never corrupts the file; a crash of the process loses nothing
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, seq INTEGER NOT NULL, done INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, page TEXT, state TEXT, unchanged INTEGER NOT NULL);
+            """)
+            self._connection = connection
+            self._sequence = connection.execute("SELECT COALESCE(MAX(seq), 0) FROM urls").fetchone()[0]
+        return self._connection
+
+    def load(self, scope: str) -> Optional[Dict]:
+        """What a crawl of `scope` had done, or None when there is nothing to resume.
+
+        A checkpoint of another scope is discarded.
+        """
+        if not os.path.exists(self.path):
+            return None
+        connection = self._connect()
+        row = connection.execute("SELECT value FROM meta WHERE key = 'scope'").fetchone()
+        if row is None or row[0] != scope:
+            self.reset(scope)
+            return None
+
+        frontier = [url for url, in connection.execute("SELECT url FROM urls WHERE done = 0 ORDER BY seq")]
+        visited = {url for url, in connection.execute("SELECT url FROM urls WHERE done = 1")}
+        content_store, page_state, unchanged_urls = {}, {}, set()
+        for key, page, state, unchanged in connection.execute("SELECT key, page, state, unchanged FROM pages"):
+            if page is not None:
+                content_store[key] = json.loads(page)
+            if state is not None:
+                page_state[key] = json.loads(state)
+            if unchanged:
+                unchanged_urls.add(key)
+        if not frontier and not visited:
+            return None
+        return {
+            'frontier': frontier,
+            'visited': visited,
+            'content_store': content_store,
+            'page_state': page_state,
+            'unchanged_urls': unchanged_urls
+        }
+
+    def reset(self, scope: str):
+        """Start over for a new crawl of `scope`"""
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM urls")
+            connection.execute("DELETE FROM pages")
+            connection.execute("DELETE FROM meta")
+            connection.execute("INSERT INTO meta VALUES ('scope', ?)", (scope,))
+        self._sequence = 0
+
+    def queue(self, urls: Iterable[str]):
+        rows = []
+        for url in urls:
+            self._sequence += 1
+            rows.append((url, self._sequence))
+        self._connect().executemany("INSERT OR IGNORE INTO urls VALUES (?, ?, 0)", rows)
+
+    def mark_done(self, urls: Iterable[str]):
+        self._connect().executemany("INSERT INTO urls VALUES (?, 0, 1) ON CONFLICT(url) DO UPDATE SET done = 1",
+                                    [(url,) for url in urls])
+
+    def record(self, key: str, page: Optional[Dict], state: Optional[Dict], unchanged: bool):
+        self._connect().execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                                (key, json.dumps(page) if page is not None else None,
+                                 json.dumps(state) if state is not None else None, int(unchanged)))
+
+    def commit(self):
+        if self._connection is not None:
+            self._connection.commit()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    def discard(self):
+        """Delete the checkpoint once the crawl's results are stored elsewhere"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
@@ -0,0 +1,173 @@
+from typing import Callable, Iterable, Iterator, List, Tuple
+import re
+from bs4 import NavigableString, Tag
+
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+TEXT_TAGS = {'p', 'li', 'dt', 'dd', 'blockquote', 'td', 'th', 'figcaption', 'caption', 'summary'}
+CODE_TAGS = {'pre'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'button', 'form'}
+BLOCK_TAGS = HEADING_TAGS | TEXT_TAGS | CODE_TAGS | {'div', 'section', 'article', 'ul', 'ol', 'dl', 'table', 'tr'}
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate: one token per word or punctuation mark"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def extract_blocks(element) -> Iterator[Tuple[str, str]]:
+    """Yield (kind, text) blocks from an HTML element in document order.
+
+    kind is 'heading', 'code' or 'text'. Code keeps its line breaks; other
+    text is whitespace-normalised.
+    """
+    inline_text = []
+
+    def flush():
+        text = _normalize(''.join(inline_text))
+        inline_text.clear()
+        if text:
+            yield 'text', text
+
+    for child in element.children:
+        if isinstance(child, NavigableString):
+            if type(child) is NavigableString:
+                inline_text.append(str(child))
+            continue
+        if not isinstance(child, Tag) or child.name in SKIP_TAGS:
+            continue
+
+        if child.name not in BLOCK_TAGS:
+            if child.find(BLOCK_TAGS) is None:
+                inline_text.append(child.get_text())
+                continue
+        yield from flush()
+
+        if child.name in HEADING_TAGS:
+            text = _normalize(child.get_text())
+            if text:
+                yield 'heading', text
+        elif child.name in CODE_TAGS:
+            text = child.get_text().strip('\n')
+            if text.strip():
+                yield 'code', text
+        elif child.name in TEXT_TAGS and child.find(BLOCK_TAGS) is None:
+            text = _normalize(child.get_text())
+            if text:
+                yield 'text', text
+        else:
+            yield from extract_blocks(child)
+
+    yield from flush()
+
+
+class Chunker:
+    """Packs extracted blocks into token-budgeted chunks.
+
+    A heading always starts a new chunk and is repeated at the top of every
+    chunk of its section, so sections never bleed into each other. Within
+    a section, paragraphs and code blocks are packed whole while they fit
+    in `max_tokens`; longer ones are split on sentences (or lines for
+    code), then on words. Consecutive chunks of a section share up to
+    `overlap_tokens` of trailing text.
+    """
+
+    def __init__(self, max_tokens: int = 300, overlap_tokens: int = 40,
+                 token_counter: Callable[[str], int] = count_tokens):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = token_counter
+
+    def _units(self, kind: str, text: str, budget: int) -> List[Tuple[str, str]]:
+        """Break one block into (separator, text) units of at most `budget` tokens.
+
+        A block that fits is a single unit. Otherwise it is split into
+        sentences (lines for code), and any sentence still over budget
+        into word windows, so overlap can be taken at a fine grain. Blank
+        sentences and lines are dropped.
+        """
+        if self.count_tokens(text) <= budget:
+            return [('\n\n', text)]
+
+        joiner = '\n' if kind == 'code' else ' '
+        parts = text.split('\n') if kind == 'code' else _SENTENCE_RE.split(text)
+        units = []
+        for part in parts:
+            if not part.strip():
+                continue
+            if self.count_tokens(part) <= budget:
+                units.append((joiner, part))
+            else:
+                units.extend((joiner, window) for window in self._windows(part, budget))
+        units[0] = ('\n\n', units[0][1])
+        return units
+
+    def _windows(self, text: str, budget: int) -> List[str]:
+        """Consecutive runs of words of at most `budget` counted tokens each"""
+        windows, window, used = [], '', 0
+        for word in text.split():
+            tokens = self.count_tokens(word)
+            if tokens <= budget:
+                pieces = [(' ', word, tokens)]
+            else:
+                # A word over budget on its own, such as a long URL, is cut between its tokens
+                pieces = [(' ' if i == 0 else '', piece, self.count_tokens(piece))
+                          for i, piece in enumerate(_TOKEN_RE.findall(word))]
+            for sep, piece, piece_tokens in pieces:
+                if window and used + piece_tokens > budget:
+                    windows.append(window)
+                    window, used = '', 0
+                window = f"{window}{sep}{piece}" if window else piece
+                used += piece_tokens
+        if window:
+            windows.append(window)
+        return windows
+
+    def chunk(self, blocks: Iterable[Tuple[str, str]]) -> Iterator[str]:
+        """Consume blocks lazily and yield chunk texts"""
+        heading = ''
+        units = []  # (separator, text, tokens) packed into the chunk being built
+
+        def render(parts):
+            body = parts[0][1] + ''.join(sep + text for sep, text, _ in parts[1:])
+            return f"{heading}\n\n{body}" if heading else body
+
+        def carry_over(parts):
+            kept, total = [], 0
+            for part in reversed(parts):
+                if total + part[2] > self.overlap_tokens:
+                    break
+                kept.insert(0, part)
+                total += part[2]
+            return kept
+
+        for kind, text in blocks:
+            if kind == 'heading':
+                if units:
+                    yield render(units)
+                heading, units = text, []
+                continue
+
+            budget = self.max_tokens - (self.count_tokens(heading) if heading else 0)
+            budget = max(budget, self.overlap_tokens + 1)
+            for sep, piece in self._units(kind, text, budget):
+                tokens = self.count_tokens(piece)
+                used = sum(part[2] for part in units)
+                if units and used + tokens > budget:
+                    yield render(units)
+                    units = carry_over(units)
+                    # Drop overlap that would leave no room for the new piece
+                    while units and sum(part[2] for part in units) + tokens > budget:
+                        units.pop(0)
+                units.append((sep, piece, tokens))
+
+        if units:
+            yield render(units)
@@ -0,0 +1,87 @@
+from typing import Dict
+import argparse
+import os
+import shutil
+from .batch import read_questions, run_batch
+from .cache import ResponseCache
+from .context import ContextBuilder
+from .memory import ConversationMemory
+from .metrics import Metrics
+from .store import default_cache_path
+
+DEFAULT_URL = "https://thecatapi.com/"
+
+
+def argument_parser(description: str) -> argparse.ArgumentParser:
+    """Options every chatbot front end takes; front ends add their own store options"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--url', help="documentation URL; prompted for when omitted")
+    parser.add_argument('--serve', action='store_true', help="serve the chatbot over HTTP instead of the terminal")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-concurrent-llm', type=int, default=4,
+                        help="maximum LLM calls in flight when serving or answering a batch")
+    parser.add_argument('--batch', metavar='QUESTIONS',
+                        help="answer every question in this file (one per line, or JSONL) and exit")
+    parser.add_argument('--output', default="answers.jsonl", help="where --batch appends its answers")
+    parser.add_argument('--context-tokens', type=int, default=2048,
+                        help="token budget for retrieved chunks plus chat history in each prompt")
+    parser.add_argument('--history-turns', type=int, default=5,
+                        help="recent turns kept verbatim; older ones are folded into a running summary")
+    parser.add_argument('--summarize-with-llm', action='store_true',
+                        help="summarize older turns with the LLM instead of keeping one line per turn")
+    parser.add_argument('--metrics-file',
+                        help="record per-stage latency and token metrics to this file (.prom for Prometheus text, else JSON)")
+    parser.add_argument('--no-stream', action='store_true', help="print answers only once they are complete")
+    parser.add_argument('--no-cache', action='store_true', help="always call the LLM, never reuse cached answers")
+    parser.add_argument('--cache-similarity', type=float, default=None,
+                        help="also reuse answers to questions whose TF-IDF cosine similarity is at least this")
+    return parser
+
+
+def documentation_url(args) -> str:
+    """--url, or the URL the user types in, or the default"""
+    url = args.url
+    if url is None:
+        url = input(f"Enter documentation URL (press Enter for default: {DEFAULT_URL}): ").strip()
+    return url if url else DEFAULT_URL
+
+
+def chatbot_options(args, url: str) -> Dict:
+    """Response cache, streaming, metrics and context budget for a chatbot, from the shared options"""
+    response_cache = None
+    if not args.no_cache:
+        cache_path = default_cache_path(url)
+        # Caches from before the store home sat in the working directory, named with the ':' Windows refuses
+        legacy_cache_path = f"response_cache_{url.replace('/', '_')}.sqlite3"
+        if os.path.exists(legacy_cache_path) and not os.path.exists(cache_path):
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            shutil.move(legacy_cache_path, cache_path)
+        response_cache = ResponseCache(cache_path, similarity_threshold=args.cache_similarity)
+    return {
+        'response_cache': response_cache,
+        # Streaming only helps a person watching the terminal
+        'stream': not (args.no_stream or args.serve or args.batch),
+        'metrics': Metrics(enabled=args.metrics_file is not None or args.serve, path=args.metrics_file),
+        'context_builder': ContextBuilder(max_tokens=args.context_tokens, history_tokens=args.context_tokens // 4)
+    }
+
+
+def run(chatbot, args, **serve_options):
+    """Answer a batch, serve over HTTP or chat in the terminal, as `args` ask.
+
+    `serve_options` (a transcript, an on_turn hook) go to docrag.server.serve.
+    Served conversations keep --history-turns turns and summarize older ones
+    like the chatbot's own memory does.
+    """
+    if args.batch:
+        run_batch(chatbot, read_questions(args.batch), args.output, concurrency=args.max_concurrent_llm)
+    elif args.serve:
+        # Imported here so the terminal chat works without the web dependencies
+        from .server import serve
+        serve(chatbot, host=args.host, port=args.port, max_concurrent_llm=args.max_concurrent_llm,
+              memory_factory=lambda: ConversationMemory(max_recent=args.history_turns,
+                                                        summarizer=chatbot.memory.summarizer),
+              **serve_options)
+    else:
+        chatbot.chat_loop()
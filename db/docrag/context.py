@@ -0,0 +1,126 @@
+from typing import Callable, Dict, List, Tuple
+import re
+from .chunking import count_tokens
+
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+NO_HISTORY = "No previous conversation."
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def truncate_to_tokens(text: str, max_tokens: int, token_counter: Callable[[str], int] = count_tokens) -> str:
+    """Keep whole leading sentences, then whole words, within `max_tokens`"""
+    if token_counter(text) <= max_tokens:
+        return text
+    # One token is kept back for the ellipsis
+    max_tokens -= 1
+    kept, used = [], 0
+    for sentence in _SENTENCE_RE.split(text):
+        tokens = token_counter(sentence)
+        if used + tokens > max_tokens:
+            if not kept:
+                # A single overlong sentence: fall back to words
+                for word in sentence.split():
+                    tokens = token_counter(word)
+                    if used + tokens > max_tokens:
+                        break
+                    kept.append(word)
+                    used += tokens
+            break
+        kept.append(sentence)
+        used += tokens
+    return ' '.join(kept + ['…'])
+
+
+class ContextBuilder:
+    """Packs search results and chat history into a fixed token budget.
+
+    History gets at most `history_tokens`, newest turn first, with each
+    answer cut to `answer_tokens`; a running summary of older turns takes
+    what the recent turns leave of it. The chunks get whatever is left of
+    `max_tokens`. Chunks are taken in retrieval order (best first), skipping any whose
+    word 3-grams are at least `duplicate_threshold` contained in a chunk
+    already taken (chunker overlap, the same page under two URLs). A chunk
+    that no longer fits is truncated if at least `min_chunk_tokens` remain,
+    otherwise skipped in favour of smaller ones further down.
+    """
+
+    def __init__(self, max_tokens: int = 2048, history_tokens: int = 512, answer_tokens: int = 120,
+                 min_score: float = 0.1, duplicate_threshold: float = 0.8, min_chunk_tokens: int = 48,
+                 token_counter: Callable[[str], int] = count_tokens):
+        if history_tokens >= max_tokens:
+            raise ValueError("history_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.history_tokens = history_tokens
+        self.answer_tokens = answer_tokens
+        self.min_score = min_score
+        self.duplicate_threshold = duplicate_threshold
+        self.min_chunk_tokens = min_chunk_tokens
+        self.count_tokens = token_counter
+
+    def format_history(self, history: List[Dict], summary: str = '') -> Tuple[str, int]:
+        """Summary and the most recent turns that fit the history budget, oldest first"""
+        turns, used = [], 0
+        for entry in reversed(history or []):
+            answer = truncate_to_tokens(entry['answer'], self.answer_tokens, self.count_tokens)
+            turn = f"Human: {entry['question']}\nAssistant: {answer}\n"
+            tokens = self.count_tokens(turn)
+            if used + tokens > self.history_tokens:
+                break
+            turns.insert(0, turn)
+            used += tokens
+        if summary:
+            # The summary's newest lines matter most, so trim from the top
+            lines = summary.split('\n')
+            while lines:
+                text = "Summary of earlier conversation:\n" + "\n".join(lines) + "\n"
+                tokens = self.count_tokens(text)
+                if used + tokens <= self.history_tokens:
+                    turns.insert(0, text)
+                    used += tokens
+                    break
+                lines.pop(0)
+        if not turns:
+            return NO_HISTORY, 0
+        return "\n".join(turns), used
+
+    def select_chunks(self, search_results: List[Dict], budget: int) -> List[Dict]:
+        """Deduplicated results, best first, with 'content' cut to fit `budget` tokens in total"""
+        selected, selected_shingles = [], []
+        remaining = budget
+        for result in search_results:
+            if result['relevance_score'] <= self.min_score:
+                continue
+            shingles = _shingles(result['content'])
+            if shingles and any(len(shingles & other) >= self.duplicate_threshold * len(shingles)
+                                for other in selected_shingles):
+                continue
+
+            header = f"From {result['title']}:\n"
+            tokens = self.count_tokens(header + result['content'])
+            if tokens > remaining:
+                if remaining < self.min_chunk_tokens:
+                    continue
+                content = truncate_to_tokens(result['content'], remaining - self.count_tokens(header),
+                                             self.count_tokens)
+                result = dict(result, content=content)
+                tokens = self.count_tokens(header + content)
+            selected.append(result)
+            selected_shingles.append(shingles)
+            remaining -= tokens
+        return selected
+
+    def build(self, search_results: List[Dict], history: List[Dict] = None,
+              summary: str = '') -> Tuple[str, str, List[Dict]]:
+        """Return (context, history_text, results used in the context)"""
+        history_text, history_used = self.format_history(history, summary)
+        selected = self.select_chunks(search_results, self.max_tokens - history_used)
+        context = "\n\n".join(f"From {result['title']}:\n{result['content']}" for result in selected)
+        return context, history_text, selected
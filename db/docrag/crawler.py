@@ -0,0 +1,393 @@
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+import hashlib
+import threading
+import requests
+from .checkpoint import CrawlCheckpoint
+from .chunking import Chunker
+from .dedup import SimhashIndex, simhash
+from .httpclient import shared_session
+from .parsing import get_parser
+from .politeness import HostRateLimiter, RobotsPolicy, host_of, parse_lastmod, parse_retry_after, parse_sitemap
+from .urls import TRACKING_PARAMETERS, canonicalize_url, in_scope, resolve_url
+
+
+class DocumentationCrawler:
+    """Breadth-first documentation crawler with bounded parallelism.
+
+    Pages are fetched from a frontier queue by a thread pool. At most
+    `max_workers` requests are in flight overall and at most `max_per_host`
+    against any single host. Results land in `content_store` keyed by URL.
+
+    Pages are visited and stored under their canonical URL (see
+    docrag.urls), so `page`, `page/`, `page#section` and
+    `page?utm_source=x` are one page; query parameters matching
+    `query_denylist` (tracking parameters by default) are dropped and the
+    rest kept. The page itself is fetched at the first URL it was linked
+    as. Relative links are resolved against the page's final URL. A page
+    whose <link rel="canonical"> or redirect names another URL is stored
+    under that URL, once. With `near_duplicate_distance`, a page whose
+    SimHash is within that many bits of a page already kept is not
+    chunked.
+
+    `page_state` holds per-page validators (ETag, Last-Modified), a content
+    hash and the outgoing links. When it is seeded from a previous crawl,
+    pages are fetched with conditional GETs; pages that come back 304 or
+    with an identical content hash are recorded in `unchanged_urls` instead
+    of `content_store`, and their stored links keep the crawl going. Pages
+    seen again that nearly duplicate a kept page land in `duplicate_urls`.
+
+    Pages are parsed in one pass by the `parser` backend (see
+    docrag.parsing; the fastest installed when not given), and their text
+    is split by `chunker` (a `Chunker` with default budgets when not
+    given) along headings, paragraphs and code blocks.
+
+    The crawler is polite: it skips URLs that robots.txt disallows for
+    `user_agent` and keeps each host under `requests_per_second` (or the
+    robots.txt Crawl-delay), backing off and retrying when the host
+    answers 429 or 503. A page that still answers with an error is never
+    stored: it keeps its previous state, if any. With `use_sitemaps`, the
+    site's sitemaps seed the frontier, and pages whose sitemap <lastmod>
+    predates their previous fetch are reused without a request.
+
+    Requests go through `session`, by default the process-wide pooled
+    session, so connections to a host are kept alive across pages.
+
+    With `checkpoint` (a path or a `CrawlCheckpoint`), the frontier, the
+    visited URLs and every fetched page are saved as the crawl goes. A
+    crawl that is interrupted resumes from there on the next `crawl()`
+    call, even in a new process. Call `discard_checkpoint()` once the
+    results are stored, or the next crawl resumes this finished one.
+    """
+
+    def __init__(self, base_url: str, max_workers: int = 8, max_per_host: int = 4, timeout: float = 15.0,
+                 page_state: dict = None, chunker: Chunker = None, user_agent: str = 'docrag-crawler/1.0',
+                 requests_per_second: float = 4.0, respect_robots: bool = True, use_sitemaps: bool = True,
+                 max_retries: int = 3, session: requests.Session = None, parser: str = None,
+                 query_denylist: Iterable[str] = TRACKING_PARAMETERS, near_duplicate_distance: Optional[int] = 3,
+                 checkpoint=None):
+        self.base_url = base_url
+        self.query_denylist = tuple(query_denylist)
+        # Canonical base URL; only pages at or below it are crawled
+        self.scope = self._canonical(base_url)
+        self.near_duplicate_distance = near_duplicate_distance
+        self.near_duplicates = None
+        self.chunker = chunker or Chunker()
+        self.parse_html = get_parser(parser)
+        self.visited_urls = set()
+        self.content_store = {}
+        self.page_state = dict(page_state or {})
+        self.unchanged_urls = set()
+        self.duplicate_urls = set()
+        self._previous_state = {}
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        self.user_agent = user_agent
+        self.session = session or shared_session()
+        self.rate_limiter = HostRateLimiter(rate=requests_per_second, burst=max_per_host)
+        self.robots = RobotsPolicy(self._get, user_agent) if respect_robots else None
+        self.use_sitemaps = use_sitemaps
+        self.max_retries = max_retries
+        self.sitemap_lastmod = {}
+        # requests, redirects, throttled, disallowed, sitemap_unchanged, canonical_duplicates and
+        # near_duplicates counts of the last crawl
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self.checkpoint = CrawlCheckpoint(checkpoint) if isinstance(checkpoint, str) else checkpoint
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _canonical(self, url: str, base: str = None) -> Optional[str]:
+        return canonicalize_url(url, base, self.query_denylist)
+
+    def _should_visit(self, url: str) -> bool:
+        """Whether the page `url` links to is under `base_url` and not visited yet"""
+        key = self._canonical(url)
+        return key is not None and key not in self.visited_urls and in_scope(key, self.scope)
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _get(self, url: str, headers: dict = None) -> requests.Response:
+        """GET within the host's rate limit, retrying with backoff while the host answers 429 or 503"""
+        headers = dict(headers or {}, **{'User-Agent': self.user_agent})
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            with self._host_slot(url):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            # Redirects the session followed are requests too
+            self._count('requests', 1 + len(response.history))
+            if response.history:
+                self._count('redirects', len(response.history))
+            if response.status_code not in (429, 503) or attempt == self.max_retries:
+                break
+            self._count('throttled')
+            delay = self.rate_limiter.backoff(url, parse_retry_after(response.headers.get('Retry-After')))
+            print(f"Throttled ({response.status_code}) by {host_of(url)}, retrying {url} in {delay:.1f}s")
+        if response.status_code < 400:
+            self.rate_limiter.success(url)
+        return response
+
+    def _sitemap_urls(self, url: str) -> list:
+        """Page URLs under `base_url` from the sitemaps robots.txt lists, else from /sitemap.xml"""
+        queue = self.robots.sitemaps(url) if self.robots else []
+        if not queue:
+            queue = list(dict.fromkeys([f"{self.scope.rstrip('/')}/sitemap.xml", f"{host_of(url)}/sitemap.xml"]))
+        seen = set()
+        urls = []
+        # Sitemap indexes can nest; a bounded number of files keeps a broken site from looping
+        while queue and len(seen) < 50:
+            sitemap_url = queue.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            try:
+                response = self._get(sitemap_url)
+                if response.status_code != 200:
+                    continue
+                pages, nested = parse_sitemap(response.content)
+            except Exception as e:
+                print(f"Error reading sitemap {sitemap_url}: {str(e)}")
+                continue
+            queue.extend(nested)
+            for page_url, lastmod in pages.items():
+                page_url, key = resolve_url(page_url), self._canonical(page_url)
+                if page_url is not None and key is not None and in_scope(key, self.scope):
+                    urls.append(page_url)
+                    self.sitemap_lastmod[key] = parse_lastmod(lastmod)
+        return urls
+
+    def _resume(self, frontier: deque):
+        """Restore an interrupted crawl of this scope from the checkpoint, or start a new checkpoint"""
+        resumed = self.checkpoint.load(self.scope)
+        if resumed is None:
+            self.checkpoint.reset(self.scope)
+            self.checkpoint.queue(frontier)
+            return
+
+        frontier.clear()
+        frontier.extend(resumed['frontier'])
+        self.visited_urls |= resumed['visited']
+        self.content_store.update(resumed['content_store'])
+        self.page_state.update(resumed['page_state'])
+        self.unchanged_urls |= resumed['unchanged_urls']
+        self.duplicate_urls |= {key for key, state in resumed['page_state'].items()
+                                if 'duplicate_of' in state and key not in self.content_store}
+        for key in (*self.content_store, *self.unchanged_urls):
+            self._keep_fingerprint(key, self.page_state.get(key, {}))
+        print(f"Resuming crawl from {self.checkpoint!r}: {len(resumed['page_state'])} pages done, "
+              f"{len(frontier)} queued")
+
+    def discard_checkpoint(self):
+        """Forget the crawl's checkpoint; call it once the results are stored"""
+        if self.checkpoint is not None:
+            self.checkpoint.discard()
+
+    def crawl(self, url: str):
+        """Crawl `url` and every reachable page under `base_url`, resuming an interrupted crawl"""
+        url = resolve_url(url) or url
+        frontier = deque([url])
+        pending = set()
+        self._previous_state = dict(self.page_state)
+        self.stats = Counter()
+        if self.near_duplicate_distance is not None:
+            self.near_duplicates = SimhashIndex(self.near_duplicate_distance)
+        if self.checkpoint is not None:
+            self._resume(frontier)
+
+        if self.robots:
+            crawl_delay = self.robots.crawl_delay(url)
+            if crawl_delay:
+                self.rate_limiter.set_ceiling(url, 1 / crawl_delay)
+        if self.use_sitemaps:
+            sitemap_urls = self._sitemap_urls(url)
+            if sitemap_urls:
+                print(f"Seeded {len(sitemap_urls)} URLs from sitemaps")
+            frontier.extend(sitemap_urls)
+            if self.checkpoint is not None:
+                self.checkpoint.queue(page_url for page_url in sitemap_urls if self._should_visit(page_url))
+
+        try:
+            self._crawl_frontier(frontier, pending)
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+
+        print(f"Crawl finished: {self.stats['requests']} requests ({self.stats['redirects']} redirects), "
+              f"{self.stats['throttled']} throttled, "
+              f"{self.stats['disallowed']} disallowed by robots.txt, "
+              f"{self.stats['sitemap_unchanged']} unchanged per sitemap, "
+              f"{self.stats['canonical_duplicates'] + self.stats['near_duplicates']} duplicates")
+
+    def _crawl_frontier(self, frontier: deque, pending: set):
+        checkpoint = self.checkpoint
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while frontier or pending:
+                # Keep the pool saturated without materialising the whole frontier as futures
+                while frontier and len(pending) < self.max_workers * 2:
+                    next_url = frontier.popleft()
+                    if not self._should_visit(next_url):
+                        continue
+                    self.visited_urls.add(self._canonical(next_url))
+                    if self.robots and not self.robots.allowed(next_url):
+                        self._count('disallowed')
+                        if checkpoint is not None:
+                            checkpoint.mark_done({next_url, self._canonical(next_url)})
+                        continue
+                    pending.add(executor.submit(self._fetch_page, next_url))
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fetched_url, page_url, key, page, links, state = future.result()
+                    if key != page_url:
+                        # Redirected or rel=canonical: keep the page once, under its canonical URL
+                        self.visited_urls.add(key)
+                        if key in self.content_store or key in self.unchanged_urls:
+                            self._count('canonical_duplicates')
+                            page = state = None
+                    if state is not None:
+                        self.page_state[key] = state
+                    if page is not None:
+                        self.content_store[key] = page
+                    elif state is not None and 'duplicate_of' in state:
+                        self.duplicate_urls.add(key)
+                    elif state is not None:
+                        self.unchanged_urls.add(key)
+                    new_links = [link for link in links if self._should_visit(link)]
+                    frontier.extend(new_links)
+
+                    if checkpoint is not None:
+                        if state is not None:
+                            checkpoint.record(key, page, state, key in self.unchanged_urls)
+                        checkpoint.queue(new_links)
+                        checkpoint.mark_done({fetched_url, page_url, key})
+                # One transaction per batch of results; at most this batch is fetched again after a crash
+                if checkpoint is not None:
+                    checkpoint.commit()
+
+    def _previous_page(self, url: str):
+        previous = self._previous_state.get(url)
+        if previous is None or 'removed_at' in previous:
+            return None
+        return previous
+
+    def _unchanged_per_sitemap(self, url: str, previous: dict) -> bool:
+        """Whether the sitemap says the page has not changed since it was last fetched"""
+        lastmod = self.sitemap_lastmod.get(url)
+        fetched_at = parse_lastmod(previous.get('fetched_at'))
+        return lastmod is not None and fetched_at is not None and lastmod <= fetched_at
+
+    def _page_links(self, links, base: str = None) -> list:
+        """Resolved links under `base_url`, the first spelling of each canonical URL in order of appearance"""
+        resolved = {}
+        for link in links:
+            link = resolve_url(link, base)
+            key = self._canonical(link) if link is not None else None
+            if key is not None and key not in resolved and in_scope(key, self.scope):
+                resolved[key] = link
+        return list(resolved.values())
+
+    def _keep_fingerprint(self, key: str, state: dict):
+        """Register an unchanged page, so changed pages that copy it are caught"""
+        if self.near_duplicates is not None and state.get('simhash') is not None and 'duplicate_of' not in state:
+            self.near_duplicates.add_unless_duplicate(key, state['simhash'])
+
+    def _fetch_page(self, url: str):
+        """Fetch and parse a single page, returning (url, canonical url, key, page data, links, page state)
+
+        The key is the canonical URL the page is stored under: its own, or
+        the one its redirect or <link rel="canonical"> points to.
+
+        Page data is None when the page is unchanged since the previous crawl
+        (state is set), nearly duplicates a page already kept (state has
+        'duplicate_of') or could not be fetched (state is None).
+        """
+        url_key = self._canonical(url)
+        previous = self._previous_page(url_key)
+        if previous and self._unchanged_per_sitemap(url_key, previous):
+            self._count('sitemap_unchanged')
+            self._keep_fingerprint(url_key, previous)
+            return url, url_key, url_key, None, self._page_links(previous['links']), previous
+        try:
+            print(f"Crawling: {url}")
+            headers = {}
+            if previous:
+                if previous.get('etag'):
+                    headers['If-None-Match'] = previous['etag']
+                if previous.get('last_modified'):
+                    headers['If-Modified-Since'] = previous['last_modified']
+            fetched_at = datetime.now(timezone.utc).isoformat()
+            response = self._get(url, headers=headers)
+
+            if response.status_code == 304 and previous:
+                self._keep_fingerprint(url_key, previous)
+                return url, url_key, url_key, None, self._page_links(previous['links']), dict(previous, fetched_at=fetched_at)
+            if response.status_code in (404, 410):
+                print(f"Gone: {url}")
+                return url, url_key, url_key, None, [], None
+            if response.status_code >= 400:
+                # Throttling that outlasted the retries or a server error: the body is an error page, not content
+                raise requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+
+            # Title, main-content blocks, links and rel=canonical from a single pass over the page
+            title, blocks, links, canonical = self.parse_html(response.text)
+            content = '\n'.join(text for _, text in blocks)
+
+            # Relative links and rel=canonical resolve against where the page ended up after redirects
+            page_url = response.url or url
+            absolute_links = self._page_links(links, page_url)
+            key = url_key
+            for candidate in (page_url, canonical):
+                candidate = self._canonical(candidate, page_url) if candidate else None
+                if candidate is not None and in_scope(candidate, self.scope):
+                    key = candidate
+
+            state = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+                'simhash': simhash(content) if content else None,
+                'links': absolute_links,
+                'fetched_at': fetched_at
+            }
+            if previous and previous.get('content_hash') == state['content_hash']:
+                self._keep_fingerprint(key, state)
+                return url, url_key, key, None, absolute_links, state
+
+            # Checked before chunking, so a mirrored or printable copy of a page costs no chunks
+            if self.near_duplicates is not None and state['simhash'] is not None:
+                duplicate_of = self.near_duplicates.add_unless_duplicate(key, state['simhash'])
+                if duplicate_of is not None:
+                    self._count('near_duplicates')
+                    print(f"Near-duplicate of {duplicate_of}: {url}")
+                    state['duplicate_of'] = duplicate_of
+                    return url, url_key, key, None, absolute_links, state
+
+            chunks = list(self.chunker.chunk(blocks))
+            page = {
+                'chunks': chunks,
+                'title': title or key
+            }
+            return url, url_key, key, page, absolute_links, state
+
+        except Exception as e:
+            print(f"Error crawling {url}: {str(e)}")
+            # Keep what we already have rather than dropping a page on a transient failure
+            if previous:
+                return url, url_key, url_key, None, self._page_links(previous['links']), previous
+            return url, url_key, url_key, None, [], None
@@ -0,0 +1,84 @@
+from typing import Dict, Optional
+import hashlib
+import re
+import threading
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+")
+
+# 64-bit fingerprints split into 4 bands: pages within 3 differing bits share at least one band exactly
+BANDS = 4
+BAND_BITS = 64 // BANDS
+
+
+def _rotl(values, bits: int):
+    return (values << np.uint64(bits)) | (values >> np.uint64(64 - bits))
+
+
+def _mix(values):
+    """splitmix64 finalizer: spreads every input bit over the whole word"""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash of the word shingles of `text`; similar texts differ in few bits"""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return 0
+    # Each distinct word is hashed once; shingle hashes are combined from word hashes in numpy
+    word_ids = {}
+    positions = [word_ids.setdefault(word, len(word_ids)) for word in words]
+    word_hashes = np.frombuffer(b''.join(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest()
+                                         for word in word_ids), dtype='>u8').astype(np.uint64)
+    hashes = word_hashes[np.array(positions)]
+    n_shingles = max(len(words) - shingle_size + 1, 1)
+    shingles = hashes[:n_shingles].copy()
+    for offset in range(1, min(shingle_size, len(words))):
+        shingles ^= _rotl(hashes[offset:offset + n_shingles], (offset * 21) % 64)
+    shingles = _mix(shingles)
+
+    bits = np.unpackbits(shingles.astype('>u8').view(np.uint8).reshape(-1, 8), axis=1)
+    # A bit is set when most shingles set it
+    majority = bits.sum(axis=0) * 2 > n_shingles
+    return int.from_bytes(np.packbits(majority).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimhashIndex:
+    """Fingerprints of the pages kept so far, for near-duplicate lookups by band.
+
+    Thread-safe: `add_unless_duplicate` checks and registers atomically,
+    so of two near-identical pages fetched concurrently exactly one is
+    kept.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookups")
+        self.max_distance = max_distance
+        self.fingerprints: Dict[str, int] = {}
+        self._bands = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _band_keys(fingerprint: int):
+        mask = (1 << BAND_BITS) - 1
+        return [(fingerprint >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+    def add_unless_duplicate(self, key: str, fingerprint: int) -> Optional[str]:
+        """Register `key` and return None, or return the kept page it nearly duplicates"""
+        band_keys = self._band_keys(fingerprint)
+        with self._lock:
+            for band, band_key in zip(self._bands, band_keys):
+                for other in band.get(band_key, ()):
+                    if other != key and hamming(fingerprint, self.fingerprints[other]) <= self.max_distance:
+                        return other
+            self.fingerprints[key] = fingerprint
+            for band, band_key in zip(self._bands, band_keys):
+                band.setdefault(band_key, []).append(key)
+            return None
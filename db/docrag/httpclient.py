@@ -0,0 +1,65 @@
+from typing import Iterable
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+# (connect, read) seconds; a hung host fails the request instead of stalling its caller
+DEFAULT_TIMEOUT = (5.0, 30.0)
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    """requests.Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_size: int = 16, retries: int = 3, backoff: float = 0.5,
+                   retry_statuses: Iterable[int] = (500, 502, 504), timeout=DEFAULT_TIMEOUT,
+                   user_agent: str = None) -> PooledSession:
+    """HTTP session with keep-alive connection pools, compression and retries.
+
+    Up to `pool_size` connections per host are kept open and reused.
+    Connection errors and `retry_statuses` are retried up to `retries`
+    times with jittered exponential backoff (honouring Retry-After), for
+    idempotent methods only. gzip and deflate are always accepted, br
+    when brotli is installed; responses are decoded transparently.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        backoff_jitter=backoff,
+        status_forcelist=tuple(retry_statuses),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = PooledSession(timeout=timeout)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(make_headers(accept_encoding=True, keep_alive=True))
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    return session
+
+
+def shared_session() -> PooledSession:
+    """Process-wide session, so every crawler and tool shares one set of connection pools"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
@@ -0,0 +1,123 @@
+import numpy as np
+from scipy import sparse
+
+
+def _best(docs, scores, k: int):
+    """Positions of the k best scores, best first, equal scores by chunk index"""
+    if len(docs) > k:
+        # Every chunk tied with the k-th best is in the running, not whichever the partition kept
+        kth_best = np.partition(scores, len(scores) - k)[len(scores) - k]
+        best = np.flatnonzero(scores >= kth_best)
+    else:
+        best = np.arange(len(docs))
+    return best[np.lexsort((docs[best], -scores[best]))][:k]
+
+
+class InvertedIndex:
+    """Posting-list index over a TF-IDF document-term matrix.
+
+    The matrix is stored column-major, so each vocabulary term maps to a
+    contiguous run of (chunk id, weight) pairs sorted by chunk id. A query
+    only touches the posting lists of its own terms instead of scoring
+    every chunk.
+
+    Scoring is MaxScore-style: terms are taken in decreasing order of the
+    most they can add to a chunk's score. Once the terms left could not
+    lift an unseen chunk past the k-th best score so far, they are only
+    looked up for the chunks still in the running, so the long posting
+    lists of common terms are never scanned in full.
+    """
+
+    def __init__(self, vectors):
+        postings = sparse.csc_matrix(vectors)
+        postings.sort_indices()
+        self.n_docs, self.n_terms = postings.shape
+        self.indptr = postings.indptr
+        self.doc_ids = postings.indices
+        self.weights = postings.data
+        # Largest weight in each posting list: the most the term can add to a chunk, per unit of query weight
+        self.max_weights = np.zeros(self.n_terms)
+        nonempty = np.diff(self.indptr) > 0
+        if nonempty.any():
+            self.max_weights[nonempty] = np.maximum.reduceat(self.weights, self.indptr[:-1][nonempty])
+
+    def top_k(self, query_vector, k: int = 5):
+        """Return (chunk indices, scores) of the k best chunks, best first"""
+        k = min(k, self.n_docs)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        query = sparse.csr_matrix(query_vector)
+        bounds = query.data * self.max_weights[query.indices]
+        order = np.argsort(-bounds, kind='stable')
+        terms, term_weights = query.indices[order], query.data[order]
+        # The most the terms after each one can still add to any chunk's score
+        rest_bounds = np.append(np.cumsum(bounds[order][::-1])[::-1][1:], 0.0)
+
+        scores = np.zeros(self.n_docs)
+        threshold = 0.0  # a lower bound on the k-th best final score
+        candidates = None  # chunk ids still in the running, once unseen chunks are ruled out
+        for term, weight, rest in zip(terms, term_weights, rest_bounds):
+            start, end = self.indptr[term], self.indptr[term + 1]
+            if start == end:
+                continue
+            posting_docs = self.doc_ids[start:end]
+            if candidates is None:
+                # Chunk ids are distinct within a posting list, so the in-place add is exact
+                scores[posting_docs] += weight * self.weights[start:end]
+                if len(posting_docs) >= k:
+                    touched = scores[posting_docs]
+                    threshold = max(threshold, np.partition(touched, len(touched) - k)[len(touched) - k])
+                if rest < threshold:
+                    candidates = np.flatnonzero(scores + rest >= threshold)
+            elif len(candidates) * 8 > len(posting_docs):
+                # Looking up this many candidates costs more than adding the whole posting list
+                scores[posting_docs] += weight * self.weights[start:end]
+            else:
+                positions = np.searchsorted(posting_docs, candidates)
+                found = positions < len(posting_docs)
+                found[found] = posting_docs[positions[found]] == candidates[found]
+                scores[candidates[found]] += weight * self.weights[start + positions[found]]
+            if candidates is not None:
+                # Scores only grow: the threshold rises with them, and chunks that cannot reach it drop out
+                candidate_scores = scores[candidates]
+                threshold = max(threshold, np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k])
+                candidates = candidates[candidate_scores + rest >= threshold]
+
+        docs = np.flatnonzero(scores) if candidates is None else candidates
+        doc_scores = scores[docs]
+        best = _best(docs, doc_scores, k)
+        return self._pad(docs[best], doc_scores[best], k)
+
+    def top_k_many(self, query_vectors, k: int = 5):
+        """top_k for every row of a query matrix, scored in one sparse matrix product"""
+        k = min(k, self.n_docs)
+        query = sparse.csr_matrix(query_vectors)
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int64), np.empty(0)) for _ in range(query.shape[0])]
+
+        postings = sparse.csc_matrix((self.weights, self.doc_ids, self.indptr), shape=(self.n_docs, self.n_terms))
+        # Row per query, only chunks sharing a term with it are stored
+        scores = sparse.csr_matrix(query @ postings.T)
+        results = []
+        for row in range(scores.shape[0]):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            docs, row_scores = scores.indices[start:end], scores.data[start:end]
+            best = _best(docs, row_scores, k)
+            results.append(self._pad(docs[best].astype(np.int64), row_scores[best], k))
+        return results
+
+    def _pad(self, top_docs, top_scores, k: int):
+        """Pad with zero-score chunks so callers always get k results, as a full scan would"""
+        if len(top_docs) < k:
+            seen = set(top_docs.tolist())
+            filler = []
+            for doc in range(self.n_docs - 1, -1, -1):
+                if len(top_docs) + len(filler) == k:
+                    break
+                if doc not in seen:
+                    filler.append(doc)
+            top_docs = np.concatenate([top_docs, np.array(filler, dtype=top_docs.dtype)])
+            top_scores = np.concatenate([top_scores, np.zeros(len(filler))])
+
+        return top_docs, top_scores
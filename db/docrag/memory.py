@@ -0,0 +1,100 @@
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+import re
+from .chunking import count_tokens
+from .transcript import TranscriptLog
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and a documentation assistant.
+Keep facts, names and decisions the user may refer back to; drop pleasantries. Answer with the summary only,
+in at most {max_tokens} words.
+
+Current summary:
+{summary}
+
+New exchange:
+Human: {question}
+Assistant: {answer}"""
+
+Summarizer = Callable[[str, Dict], str]
+
+
+def extractive_summarizer(max_tokens: int = 256, token_counter: Callable[[str], int] = count_tokens) -> Summarizer:
+    """Summarizer that needs no LLM: one line per turn, oldest lines dropped first"""
+
+    def summarize(summary: str, turn: Dict) -> str:
+        first_sentence = _SENTENCE_RE.split(turn['answer'].strip(), maxsplit=1)[0]
+        lines = summary.split('\n') if summary else []
+        lines.append(f"- Asked: {turn['question']} Answer: {first_sentence}")
+        while len(lines) > 1 and token_counter('\n'.join(lines)) > max_tokens:
+            lines.pop(0)
+        return '\n'.join(lines)
+
+    return summarize
+
+
+def llm_summarizer(llm, max_tokens: int = 256, token_counter: Callable[[str], int] = count_tokens) -> Summarizer:
+    """Summarizer that asks `llm` to fold each evicted turn into the summary.
+
+    Costs one extra LLM call per evicted turn; falls back to the extractive
+    summarizer if the call fails.
+    """
+    fallback = extractive_summarizer(max_tokens, token_counter)
+
+    def summarize(summary: str, turn: Dict) -> str:
+        try:
+            updated = llm.call(SUMMARY_PROMPT.format(
+                max_tokens=max_tokens,
+                summary=summary or "(empty)",
+                question=turn['question'],
+                answer=turn['answer']
+            ))
+        except Exception:
+            return fallback(summary, turn)
+        return str(updated).strip() or fallback(summary, turn)
+
+    return summarize
+
+
+class ConversationMemory:
+    """Recent turns kept verbatim plus a running summary of older ones.
+
+    Only the last `max_recent` turns stay in memory. When a turn falls out
+    of that window it is folded into `summary` by `summarizer`, so memory
+    use and prompt size stay constant however long the conversation runs.
+    With a `transcript`, every turn is also logged there as it is added.
+    """
+
+    def __init__(self, max_recent: int = 5, summarizer: Optional[Summarizer] = None,
+                 transcript: Optional[TranscriptLog] = None):
+        self.recent = deque()
+        self.max_recent = max_recent
+        self.summarizer = summarizer or extractive_summarizer()
+        self.transcript = transcript
+        self.summary = ''
+        self.summarized = 0
+
+    def __len__(self) -> int:
+        return self.summarized + len(self.recent)
+
+    def add(self, question: str, answer: str, **fields):
+        turn = dict(question=question, answer=answer, **fields)
+        if self.transcript:
+            self.transcript.append(turn)
+        self.recent.append(turn)
+        while len(self.recent) > self.max_recent:
+            turn = self.recent.popleft()
+            self.summary = self.summarizer(self.summary, turn)
+            self.summarized += 1
+
+    def turns(self) -> List[Dict]:
+        """Turns still held verbatim, oldest first"""
+        return list(self.recent)
+
+    def all_turns(self) -> Iterator[Dict]:
+        """Every turn of the conversation, read back from the transcript when there is one"""
+        if self.transcript:
+            yield from self.transcript
+        else:
+            yield from self.recent
@@ -0,0 +1,173 @@
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+import bisect
+import json
+import os
+import threading
+import time
+from .chunking import count_tokens
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for le, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            yield le, total
+
+
+class Metrics:
+    """Per-stage latency histograms, token counters and corpus gauges.
+
+    The chatbots time the stages vectorize_query, score, fetch_results,
+    build_context, cache_lookup, llm and the whole request, and count
+    requests_total, llm_calls_total, cache_hits_total and LLM tokens in
+    and out. With `enabled=False` every method is a no-op, so call sites
+    don't need to check. `flush()` writes a snapshot to `path`: Prometheus text
+    format when the path ends in `.prom`, JSON otherwise.
+    """
+
+    def __init__(self, enabled: bool = True, path: Optional[str] = None, prefix: str = 'docrag'):
+        self.enabled = enabled
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._prompt_tokens = Histogram(TOKEN_BUCKETS)
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def stage(self, name: str):
+        """Context manager timing one stage of a request"""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def observe_stage(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = Histogram(LATENCY_BUCKETS)
+            self._stages[name].observe(seconds)
+
+    def inc(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[name] = value
+
+    def record_tokens(self, tokens_in: int, tokens_out: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._prompt_tokens.observe(tokens_in)
+            self._counters['tokens_in_total'] = self._counters.get('tokens_in_total', 0) + tokens_in
+            self._counters['tokens_out_total'] = self._counters.get('tokens_out_total', 0) + tokens_out
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'stages': {
+                    name: {
+                        'count': hist.count,
+                        'sum_seconds': hist.sum,
+                        'buckets': {str(le): count for le, count in hist.cumulative()}
+                    }
+                    for name, hist in self._stages.items()
+                },
+                'prompt_tokens': {
+                    'count': self._prompt_tokens.count,
+                    'sum': self._prompt_tokens.sum,
+                    'buckets': {str(le): count for le, count in self._prompt_tokens.cumulative()}
+                },
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges)
+            }
+
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {p}_stage_seconds Time spent in each request stage.")
+            lines.append(f"# TYPE {p}_stage_seconds histogram")
+            for name, hist in sorted(self._stages.items()):
+                for le, count in hist.cumulative():
+                    lines.append(f'{p}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {count}')
+                lines.append(f'{p}_stage_seconds_sum{{stage="{name}"}} {hist.sum}')
+                lines.append(f'{p}_stage_seconds_count{{stage="{name}"}} {hist.count}')
+
+            lines.append(f"# HELP {p}_prompt_tokens Tokens sent to the LLM per call.")
+            lines.append(f"# TYPE {p}_prompt_tokens histogram")
+            for le, count in self._prompt_tokens.cumulative():
+                lines.append(f'{p}_prompt_tokens_bucket{{le="{le}"}} {count}')
+            lines.append(f"{p}_prompt_tokens_sum {self._prompt_tokens.sum}")
+            lines.append(f"{p}_prompt_tokens_count {self._prompt_tokens.count}")
+
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE {p}_{name} counter")
+                lines.append(f"{p}_{name} {value}")
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {p}_{name} gauge")
+                lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Atomically rewrite the metrics file, if one is configured"""
+        if not self.enabled or not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        # The server flushes from a timer and on shutdown; both write the same temporary file
+        with self._flush_lock:
+            with open(tmp_path, 'w') as f:
+                if self.path.endswith('.prom'):
+                    f.write(self.prometheus())
+                else:
+                    json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def llm_token_counts(response, prompt: str, usage_before=None):
+    """(tokens in, tokens out) for one LLM call.
+
+    Uses the usage reported by crewai when there is one, otherwise the
+    chunker's token estimate. crewai reports the LLM's usage over its
+    lifetime, so pass `usage_before`, the LLM's usage summary taken just
+    before the call, to count only the call's own tokens.
+    """
+    usage = getattr(response, 'token_usage', None)
+    if usage is not None and usage_before is not None:
+        usage = usage.delta_since(usage_before)
+    if usage is not None and getattr(usage, 'prompt_tokens', 0):
+        return usage.prompt_tokens, usage.completion_tokens
+    return count_tokens(prompt), count_tokens(str(response))
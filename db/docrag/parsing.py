@@ -0,0 +1,281 @@
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+from .chunking import BLOCK_TAGS, CODE_TAGS, HEADING_TAGS, SKIP_TAGS, _normalize, extract_blocks
+
+# Elements that never have children or an end tag
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+             'track', 'wbr'}
+
+# (title, blocks, links, canonical): title or None, (kind, text) blocks of the main content,
+# every <a href> in order, and the <link rel="canonical"> href or None
+ParsedPage = Tuple[Optional[str], List[Tuple[str, str]], List[str], Optional[str]]
+
+
+class _BlockCollector:
+    """Streaming counterpart of chunking.extract_blocks for one element's subtree"""
+
+    def __init__(self):
+        self.blocks = []
+        self._inline = []
+        self._capture = None  # ('heading' | 'code', depth, text parts) while inside h1-h6 or pre
+
+    def _flush(self):
+        text = _normalize(''.join(self._inline))
+        self._inline.clear()
+        if text:
+            self.blocks.append(('text', text))
+
+    def start(self, tag: str, depth: int):
+        if self._capture is not None:
+            return
+        if tag in HEADING_TAGS or tag in CODE_TAGS:
+            self._flush()
+            self._capture = ('heading' if tag in HEADING_TAGS else 'code', depth, [])
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def end(self, tag: str, depth: int):
+        if self._capture is not None:
+            kind, capture_depth, parts = self._capture
+            if depth != capture_depth:
+                return
+            self._capture = None
+            text = ''.join(parts)
+            if kind == 'heading':
+                text = _normalize(text)
+                if text:
+                    self.blocks.append(('heading', text))
+            else:
+                text = text.strip('\n')
+                if text.strip():
+                    self.blocks.append(('code', text))
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def data(self, text: str):
+        if self._capture is not None:
+            self._capture[2].append(text)
+        else:
+            self._inline.append(text)
+
+    def close(self) -> List[Tuple[str, str]]:
+        self._flush()
+        return self.blocks
+
+
+class PageExtractor:
+    """Title, main-content blocks, links and canonical URL of a page from one stream of events.
+
+    Backends only have to report elements in document order. The main
+    content is the first <div class="document">, else the first <main>;
+    both are collected while the stream passes through them, so nested
+    or sibling candidates cost no second traversal. Text inside
+    SKIP_TAGS is ignored everywhere.
+    """
+
+    def __init__(self):
+        self.title = None
+        self.links = []
+        self.canonical = None
+        self._depth = 0
+        self._skip_depth = None
+        self._in_title = False
+        self._title_parts = []
+        self._candidates = {}  # 'document' | 'main' -> collector
+        # (depth, collector) of the candidates the stream is inside
+        self._active = []
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        self._depth += 1
+        if self._skip_depth is not None:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth = self._depth
+            return
+
+        if tag == 'a':
+            href = attrs.get('href')
+            if href is not None:
+                self.links.append(href)
+        elif tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'link' and self.canonical is None and 'canonical' in (attrs.get('rel') or '').lower().split():
+            self.canonical = attrs.get('href')
+        elif tag == 'div' and 'document' not in self._candidates and 'document' in (attrs.get('class') or '').split():
+            self._open_candidate('document', tag)
+            return
+        elif tag == 'main' and 'main' not in self._candidates:
+            self._open_candidate('main', tag)
+            return
+
+        for _, collector in self._active:
+            collector.start(tag, self._depth)
+
+    def _open_candidate(self, name: str, tag: str):
+        for _, collector in self._active:
+            collector.start(tag, self._depth)
+        collector = _BlockCollector()
+        self._candidates[name] = collector
+        self._active.append((self._depth, collector))
+
+    def end(self, tag: str):
+        depth = self._depth
+        self._depth -= 1
+        if self._skip_depth is not None:
+            if depth == self._skip_depth:
+                self._skip_depth = None
+            return
+
+        if self._in_title and tag == 'title':
+            self._in_title = False
+            self.title = _normalize(''.join(self._title_parts)) or None
+        while self._active and self._active[-1][0] == depth:
+            self._active.pop()
+        for _, collector in self._active:
+            collector.end(tag, depth)
+
+    def data(self, text: str):
+        if self._skip_depth is not None:
+            return
+        if self._in_title:
+            self._title_parts.append(text)
+        for _, collector in self._active:
+            collector.data(text)
+
+    def result(self) -> ParsedPage:
+        main = self._candidates.get('document') or self._candidates.get('main')
+        return self.title, main.close() if main else [], self.links, self.canonical
+
+
+class _StdlibEventParser(HTMLParser):
+    """html.parser driver: no tree at all, unmatched end tags ignored, unclosed elements closed on the way out"""
+
+    def __init__(self, extractor: PageExtractor):
+        super().__init__(convert_charrefs=True)
+        self.extractor = extractor
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        self.extractor.start(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self.extractor.end(tag)
+        else:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.extractor.start(tag, dict(attrs))
+        self.extractor.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.extractor.end(open_tag)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        self.extractor.data(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.extractor.end(self.open_tags.pop())
+
+
+def parse_stdlib(html: str) -> ParsedPage:
+    extractor = PageExtractor()
+    parser = _StdlibEventParser(extractor)
+    parser.feed(html)
+    parser.close()
+    return extractor.result()
+
+
+class _LxmlTarget(PageExtractor):
+    """lxml parser target: the extractor's events plus close()"""
+
+    def comment(self, text):
+        pass
+
+    def close(self) -> ParsedPage:
+        return self.result()
+
+
+def parse_lxml(html: str) -> ParsedPage:
+    """libxml2 parses, with HTML's implied end tags, and calls back into the extractor"""
+    from lxml import etree
+
+    if not html.strip():
+        return None, [], [], None
+    return etree.fromstring(html, etree.HTMLParser(target=_LxmlTarget()))
+
+
+def parse_selectolax(html: str) -> ParsedPage:
+    """Lexbor builds the tree in C; one walk over it feeds the extractor"""
+    from selectolax.lexbor import LexborHTMLParser
+
+    extractor = PageExtractor()
+    stack = [(LexborHTMLParser(html).root, False)]
+    while stack:
+        node, closing = stack.pop()
+        if node is None:
+            continue
+        tag = node.tag
+        if closing:
+            extractor.end(tag)
+        elif tag == '-text':
+            extractor.data(node.text_content or '')
+        elif tag.startswith('-') or tag.startswith('!'):
+            continue
+        else:
+            extractor.start(tag, node.attributes)
+            stack.append((node, True))
+            children = []
+            child = node.child
+            while child is not None:
+                children.append((child, False))
+                child = child.next
+            stack.extend(reversed(children))
+    return extractor.result()
+
+
+def parse_beautifulsoup(html: str) -> ParsedPage:
+    """The original BeautifulSoup(html.parser) tree walk, kept as the reference"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    main_content = soup.find('div', {'class': 'document'}) or soup.find('main')
+    blocks = list(extract_blocks(main_content)) if main_content else []
+    title = _normalize(soup.title.get_text()) or None if soup.title else None
+    canonical = soup.find('link', rel=lambda rel: rel and rel.lower() == 'canonical', href=True)
+    return title, blocks, [a['href'] for a in soup.find_all('a', href=True)], canonical['href'] if canonical else None
+
+
+PARSERS: Dict[str, Callable[[str], ParsedPage]] = {
+    'lxml': parse_lxml,
+    'selectolax': parse_selectolax,
+    'html.parser': parse_stdlib,
+    'beautifulsoup': parse_beautifulsoup
+}
+
+
+def available_parsers() -> List[str]:
+    """Backends usable here, fastest first (see benchmarks/html_parsing.py)"""
+    names = []
+    for name, module in (('lxml', 'lxml.etree'), ('selectolax', 'selectolax.lexbor')):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        names.append(name)
+    return names + ['html.parser', 'beautifulsoup']
+
+
+def get_parser(name: str = None) -> Callable[[str], ParsedPage]:
+    """Parser backend by name; the fastest installed one when `name` is None"""
+    if name is None:
+        name = available_parsers()[0]
+    if name not in PARSERS:
+        raise ValueError(f"Unknown HTML parser {name!r}; choose from {', '.join(PARSERS)}")
+    return PARSERS[name]
@@ -0,0 +1,194 @@
+from datetime import datetime
+from typing import Dict
+import io
+import numpy as np
+from scipy import sparse
+from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, JSON, ForeignKey, Text, ARRAY, func, insert, select
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, relationship
+from .storage import vectorizer_terms, build_vectorizer
+
+# Create SQLAlchemy Base
+Base = declarative_base()
+
+# Database Models
+class DocumentPage(Base):
+    __tablename__ = 'document_pages'
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String, unique=True)
+    title = Column(String)
+    chunks = relationship("ContentChunk", back_populates="page")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ContentChunk(Base):
+    __tablename__ = 'content_chunks'
+
+    id = Column(Integer, primary_key=True)
+    page_id = Column(Integer, ForeignKey('document_pages.id'))
+    content = Column(Text)
+    # Legacy dense TF-IDF vector, superseded by chunk_terms and cleared by _migrate_dense_vectors
+    vector = Column(ARRAY(Float), nullable=True)
+    page = relationship("DocumentPage", back_populates="chunks")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ChunkTerm(Base):
+    """Sparse TF-IDF weight of one term in one chunk.
+
+    The primary key leads with term_id, so the rows for a term form a
+    posting list that the database can scan by index at query time.
+    """
+    __tablename__ = 'chunk_terms'
+
+    term_id = Column(Integer, primary_key=True)
+    chunk_id = Column(Integer, ForeignKey('content_chunks.id'), primary_key=True, index=True)
+    weight = Column(Float)
+
+class VectorizerModel(Base):
+    """Fitted TF-IDF model that produced the weights in chunk_terms.
+
+    Each rebuild adds a row; the highest id is the live model, so queries
+    are always vectorized with the vocabulary the stored weights use.
+    """
+    __tablename__ = 'vectorizer_models'
+
+    id = Column(Integer, primary_key=True)
+    vocabulary = Column(JSON)  # Terms ordered by column index
+    idf = Column(ARRAY(Float))
+    n_chunks = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+def save_vectorizer(session, vectorizer, n_chunks: int):
+    """Add `vectorizer` as the newest model row"""
+    session.add(VectorizerModel(
+        vocabulary=vectorizer_terms(vectorizer),
+        idf=vectorizer.idf_.tolist(),
+        n_chunks=n_chunks
+    ))
+    session.flush()
+
+
+def latest_vectorizer_model(session):
+    """Newest stored model row, or None if none has been stored yet"""
+    return session.query(VectorizerModel).order_by(VectorizerModel.id.desc()).first()
+
+
+def copy_chunk_terms(session, term_ids, chunk_ids, weights):
+    """Bulk load chunk_terms with COPY, or a multi-row INSERT on drivers without COPY support"""
+    if len(term_ids) == 0:
+        return
+
+    cursor = session.connection().connection.cursor()
+    if hasattr(cursor, 'copy_expert'):
+        buffer = io.StringIO("".join(
+            f"{term_id}\t{chunk_id}\t{weight!r}\n"
+            for term_id, chunk_id, weight in zip(term_ids.tolist(), chunk_ids.tolist(), weights.tolist())
+        ))
+        cursor.copy_expert("COPY chunk_terms (term_id, chunk_id, weight) FROM STDIN", buffer)
+    else:
+        session.execute(insert(ChunkTerm), [
+            {'term_id': term_id, 'chunk_id': chunk_id, 'weight': weight}
+            for term_id, chunk_id, weight in zip(term_ids.tolist(), chunk_ids.tolist(), weights.tolist())
+        ])
+
+
+class PostgresStore:
+    """Knowledge base in the document_pages, content_chunks, chunk_terms and vectorizer_models tables"""
+
+    def __init__(self, engine):
+        self.engine = create_engine(engine) if isinstance(engine, str) else engine
+        Base.metadata.create_all(self.engine)
+        self.sessions = sessionmaker(bind=self.engine)
+
+    def __repr__(self):
+        return self.engine.url.render_as_string(hide_password=True)
+
+    def exists(self) -> bool:
+        """Whether a complete knowledge base is stored.
+
+        Complete means the newest model's chunk count matches the stored
+        chunks, which rules out one a crashed save left half-written.
+        Databases from before vectorizer_models count if they have chunks.
+        """
+        with self.sessions() as session:
+            model = latest_vectorizer_model(session)
+            if model is None:
+                return session.query(ContentChunk.id).first() is not None
+            return session.query(func.count(ContentChunk.id)).scalar() == model.n_chunks
+
+    def save(self, corpus: Dict, batch_size: int = 200):
+        """Replace the stored knowledge base in one transaction, inserting pages in batches"""
+        vectors = sparse.csr_matrix(corpus['vectors'])
+        vectors.sort_indices()
+
+        # Chunks of a page are contiguous in every corpus, so pages are runs of rows
+        pages = []
+        for row, meta in enumerate(corpus['metadata']):
+            if not pages or pages[-1]['url'] != meta['url']:
+                pages.append({'url': meta['url'], 'title': meta['title'], 'start': row})
+        bounds = [page['start'] for page in pages] + [len(corpus['metadata'])]
+
+        with self.sessions() as session:
+            session.query(ChunkTerm).delete(synchronize_session=False)
+            session.query(ContentChunk).delete(synchronize_session=False)
+            session.query(DocumentPage).delete(synchronize_session=False)
+            save_vectorizer(session, corpus['vectorizer'], vectors.shape[0])
+
+            for start in range(0, len(pages), batch_size):
+                batch = range(start, min(start + batch_size, len(pages)))
+
+                # RETURNING ids in parameter order ties each id to its input row
+                page_ids = session.scalars(
+                    insert(DocumentPage).returning(DocumentPage.id, sort_by_parameter_order=True),
+                    [{'url': pages[i]['url'], 'title': pages[i]['title']} for i in batch]
+                ).all()
+
+                chunk_rows = []
+                for page_id, i in zip(page_ids, batch):
+                    for row in range(bounds[i], bounds[i + 1]):
+                        chunk_rows.append({'page_id': page_id, 'content': corpus['chunks'][row]})
+
+                if chunk_rows:
+                    chunk_ids = session.scalars(
+                        insert(ContentChunk).returning(ContentChunk.id, sort_by_parameter_order=True),
+                        chunk_rows
+                    ).all()
+
+                    row, row_end = bounds[batch[0]], bounds[batch[-1] + 1]
+                    start_pos, end_pos = vectors.indptr[row], vectors.indptr[row_end]
+                    copy_chunk_terms(
+                        session,
+                        vectors.indices[start_pos:end_pos],
+                        np.repeat(chunk_ids, np.diff(vectors.indptr[row:row_end + 1])),
+                        vectors.data[start_pos:end_pos]
+                    )
+
+            # Readers see the old knowledge base or the new one, never part of it
+            session.commit()
+
+    def load(self) -> Dict:
+        """Read the knowledge base back into memory, e.g. to export it to another store"""
+        with self.sessions() as session:
+            model = latest_vectorizer_model(session)
+            rows = session.query(ContentChunk.id, ContentChunk.content, DocumentPage.url, DocumentPage.title)\
+                .join(DocumentPage, ContentChunk.page_id == DocumentPage.id)\
+                .order_by(ContentChunk.id)\
+                .all()
+            terms = session.execute(select(ChunkTerm.chunk_id, ChunkTerm.term_id, ChunkTerm.weight)).all()
+
+        chunk_ids = np.array([chunk_id for chunk_id, _, _, _ in rows], dtype=np.int64)
+        terms = np.array(terms, dtype=np.float64).reshape(-1, 3)
+        vectors = sparse.csr_matrix(
+            (terms[:, 2], (np.searchsorted(chunk_ids, terms[:, 0].astype(np.int64)), terms[:, 1].astype(np.int64))),
+            shape=(len(rows), len(model.vocabulary))
+        )
+        return {
+            'chunks': [content for _, content, _, _ in rows],
+            'metadata': [{'url': url, 'title': title} for _, _, url, title in rows],
+            'vectorizer': build_vectorizer(model.vocabulary, model.idf),
+            'vectors': vectors,
+            'postings': vectors.tocsc(),
+            'page_state': {},
+            'meta': {'created_at': model.created_at.isoformat()}
+        }
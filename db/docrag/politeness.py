@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import gzip
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+_SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def host_of(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` requests per second on average, bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds` and drop any saved-up burst"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class HostRateLimiter:
+    """Token bucket per host, slowed down multiplicatively when the host pushes back.
+
+    Every 429 or 503 halves the host's rate (down to `min_rate`) and pauses
+    it for the response's Retry-After, or an exponentially growing delay.
+    Each success then wins back a little of the rate, up to the host's
+    ceiling: `rate`, or less if robots.txt asks for a Crawl-delay.
+    """
+
+    def __init__(self, rate: float = 4.0, burst: int = 4, min_rate: float = 0.1, max_delay: float = 120.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._ceilings = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self._ceilings.get(host, self.rate), self.burst)
+            return self._buckets[host]
+
+    def set_ceiling(self, url: str, rate: float):
+        """Cap the host's rate, e.g. from a robots.txt Crawl-delay"""
+        host = host_of(url)
+        rate = max(min(rate, self.rate), self.min_rate)
+        with self._lock:
+            self._ceilings[host] = rate
+        bucket = self._bucket(host)
+        with bucket.lock:
+            bucket.rate = min(bucket.rate, rate)
+            bucket.burst = 1
+
+    def wait(self, url: str):
+        self._bucket(host_of(url)).acquire()
+
+    def success(self, url: str):
+        host = host_of(url)
+        bucket = self._bucket(host)
+        with self._lock:
+            self._failures[host] = 0
+            ceiling = self._ceilings.get(host, self.rate)
+        with bucket.lock:
+            bucket.rate = min(ceiling, bucket.rate * 1.1)
+
+    def backoff(self, url: str, retry_after: Optional[float] = None) -> float:
+        """Slow the host down after it pushed back; returns the pause in seconds"""
+        host = host_of(url)
+        bucket = self._bucket(host)
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+        with bucket.lock:
+            bucket.rate = max(self.min_rate, bucket.rate / 2)
+        delay = retry_after if retry_after is not None else 2 ** failures
+        delay = min(delay, self.max_delay)
+        bucket.pause(delay)
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Sitemap <lastmod> (W3C datetime) as an aware datetime; a bare date means the end of that day"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if 'T' not in value:
+        parsed += timedelta(days=1)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_sitemap(content: bytes) -> Tuple[Dict[str, Optional[str]], List[str]]:
+    """Page URLs with their <lastmod>, and nested sitemap URLs, from a sitemap or sitemap index"""
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+    root = ET.fromstring(content)
+    pages, sitemaps = {}, []
+    for entry in root:
+        loc = entry.findtext(f'{_SITEMAP_NS}loc') or entry.findtext('loc')
+        if not loc:
+            continue
+        if entry.tag in (f'{_SITEMAP_NS}sitemap', 'sitemap'):
+            sitemaps.append(loc.strip())
+        else:
+            pages[loc.strip()] = entry.findtext(f'{_SITEMAP_NS}lastmod') or entry.findtext('lastmod')
+    return pages, sitemaps
+
+
+class RobotsPolicy:
+    """robots.txt rules per host, fetched once with `fetch(url) -> response`.
+
+    A missing robots.txt allows everything; one that cannot be read
+    because of a server error disallows everything, as robots.txt
+    recommends.
+    """
+
+    def __init__(self, fetch, user_agent: str):
+        self.fetch = fetch
+        self.user_agent = user_agent
+        self._parsers = {}
+        self._lock = threading.Lock()
+
+    def _parser(self, url: str) -> RobotFileParser:
+        host = host_of(url)
+        with self._lock:
+            parser = self._parsers.get(host)
+            if parser is None:
+                parser = RobotFileParser(f"{host}/robots.txt")
+                try:
+                    response = self.fetch(f"{host}/robots.txt")
+                    if response.status_code >= 500:
+                        parser.disallow_all = True
+                    elif response.status_code >= 400:
+                        parser.allow_all = True
+                    else:
+                        parser.parse(response.text.splitlines())
+                except Exception:
+                    parser.allow_all = True
+                self._parsers[host] = parser
+            return parser
+
+    def allowed(self, url: str) -> bool:
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        parser = self._parser(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None and parser.request_rate(self.user_agent):
+            rate = parser.request_rate(self.user_agent)
+            delay = rate.seconds / rate.requests
+        return float(delay) if delay else None
+
+    def sitemaps(self, url: str) -> List[str]:
+        return list(self._parser(url).site_maps() or [])
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Dict, List
+from scipy import sparse
+
+
+def apply_crawl_changes(chunks: List[str], chunk_metadata: List[Dict], vectors, vectorizer, crawler):
+    """Splice the result of a conditional re-crawl into an existing index.
+
+    Chunks of unchanged pages keep their stored vectors. Changed and new
+    pages are re-chunked by the crawler and vectorized here with the
+    existing vocabulary and IDF, so terms that first appear in them stay
+    out of the index until the next full rebuild. Pages from the previous
+    crawl that were not reached again get a tombstone in `page_state`;
+    near-duplicates of kept pages were reached and have no chunks to keep.
+
+    Returns (chunks, chunk_metadata, vectors, stats).
+    """
+    changed_urls = set(crawler.content_store)
+    keep = [
+        i for i, meta in enumerate(chunk_metadata)
+        if meta['url'] in crawler.unchanged_urls and meta['url'] not in changed_urls
+    ]
+
+    new_chunks = [chunks[i] for i in keep]
+    new_metadata = [chunk_metadata[i] for i in keep]
+    added_chunks = []
+    for url, data in crawler.content_store.items():
+        for chunk in data['chunks']:
+            added_chunks.append(chunk)
+            new_metadata.append({
+                'url': url,
+                'title': data['title']
+            })
+
+    parts = [sparse.csr_matrix(vectors)[keep]]
+    if added_chunks:
+        parts.append(vectorizer.transform(added_chunks))
+    new_chunks.extend(added_chunks)
+    new_vectors = sparse.vstack(parts, format='csr')
+
+    removed_at = datetime.now().isoformat()
+    removed = 0
+    for url, state in list(crawler.page_state.items()):
+        if 'removed_at' in state:
+            continue
+        if url not in changed_urls and url not in crawler.unchanged_urls and url not in crawler.duplicate_urls:
+            crawler.page_state[url] = {'removed_at': removed_at}
+            removed += 1
+
+    stats = {
+        'changed': len(changed_urls),
+        'unchanged': len(crawler.unchanged_urls),
+        'removed': removed
+    }
+    return new_chunks, new_metadata, new_vectors, stats
@@ -0,0 +1,317 @@
+from datetime import datetime
+from typing import List, Tuple
+import json
+import os
+import shutil
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from .index import InvertedIndex
+
+# Bump when the on-disk layout changes; stale directories are rebuilt
+RETRIEVAL_FORMAT_VERSION = 1
+
+# Layout of a retrieval directory (kept next to the knowledge base it indexes):
+#   meta.json            format version, embedder spec, chunk count, knowledge base build time
+#   bm25_*.npy           BM25 term weights, CSC (posting list per term)
+#   lsa_projection.npy   vocabulary x dimensions SVD projection (LSA embedder only)
+#   ivf_centroids.npy    one centroid per inverted list
+#   ivf_offsets.npy      start of each list in ivf_ids/ivf_vectors (n_lists + 1 entries)
+#   ivf_ids.npy          chunk index of each stored vector, grouped by list
+#   ivf_vectors.npy      L2-normalised chunk embeddings, grouped by list
+
+
+class BM25Index:
+    """Okapi BM25 over the knowledge base vocabulary.
+
+    The saturated, length-normalised term weights are precomputed per
+    chunk, so a query is a sum over its terms' posting lists, served by
+    the same InvertedIndex as the TF-IDF scores.
+    """
+
+    def __init__(self, weights, vocabulary):
+        self.index = InvertedIndex(weights)
+        self.counter = CountVectorizer(vocabulary=vocabulary)
+
+    @classmethod
+    def build(cls, chunks, vocabulary, k1: float = 1.2, b: float = 0.75) -> 'BM25Index':
+        counts = CountVectorizer(vocabulary=vocabulary).transform(chunks).tocsr().astype(np.float32)
+        n_docs = counts.shape[0]
+        doc_lengths = np.asarray(counts.sum(axis=1)).ravel()
+        avg_length = doc_lengths.mean() if n_docs else 0.0
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        tf = counts.data
+        norm = np.repeat(k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9)), np.diff(counts.indptr))
+        weights = counts.copy()
+        weights.data = (idf[counts.indices] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        return cls(weights, vocabulary)
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        query_terms = self.counter.transform([query])
+        query_terms.data[:] = 1.0
+        return self.index.top_k(query_terms, k)
+
+
+class LSAEmbedder:
+    """Dense embeddings from a truncated SVD of the TF-IDF matrix.
+
+    Needs nothing beyond scikit-learn and is fitted on the knowledge base
+    itself, so it works offline for any documentation site.
+    """
+
+    def __init__(self, vectorizer, projection=None, dimensions: int = 256):
+        self.vectorizer = vectorizer
+        self.projection = projection
+        self.dimensions = dimensions
+
+    @property
+    def spec(self) -> str:
+        return f"lsa:{self.dimensions}"
+
+    def fit(self, chunks, vectors):
+        from sklearn.decomposition import TruncatedSVD
+        dimensions = max(1, min(self.dimensions, vectors.shape[0] - 1, vectors.shape[1] - 1))
+        svd = TruncatedSVD(n_components=dimensions, algorithm='randomized', random_state=0)
+        svd.fit(vectors)
+        # Row-major per term: a query only reads the rows of its own terms
+        self.projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        return self.embed_vectors(vectors)
+
+    def embed_vectors(self, vectors) -> np.ndarray:
+        # Matching dtypes, or scipy upcasts a copy of the whole projection on every call
+        vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+        return _normalize(np.asarray(vectors @ self.projection))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.embed_vectors(self.vectorizer.transform(texts))
+
+    def save(self, directory: str):
+        np.save(os.path.join(directory, 'lsa_projection.npy'), self.projection)
+
+    def load(self, directory: str):
+        self.projection = np.load(os.path.join(directory, 'lsa_projection.npy'), mmap_mode='r')
+
+
+class SentenceTransformerEmbedder:
+    """Embeddings from a local sentence-transformers model, run on the CPU"""
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', batch_size: int = 64):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("the 'st:' embedder needs `pip install sentence-transformers`") from e
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device='cpu')
+
+    @property
+    def spec(self) -> str:
+        return f"st:{self.model_name}"
+
+    def fit(self, chunks, vectors):
+        return self.embed(list(chunks))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True),
+                          dtype=np.float32)
+
+    def save(self, directory: str):
+        pass
+
+    def load(self, directory: str):
+        pass
+
+
+def canonical_embedder_spec(spec: str) -> str:
+    """'lsa', 'lsa:<dimensions>' or 'st:<sentence-transformers model>', with defaults filled in"""
+    kind, _, argument = spec.partition(':')
+    if kind == 'lsa':
+        return f"lsa:{int(argument) if argument else 256}"
+    if kind == 'st':
+        return f"st:{argument or 'all-MiniLM-L6-v2'}"
+    raise ValueError(f"Unknown embedder {spec!r}; use 'lsa[:dimensions]' or 'st:<model>'")
+
+
+def create_embedder(spec: str, vectorizer):
+    kind, _, argument = canonical_embedder_spec(spec).partition(':')
+    if kind == 'lsa':
+        return LSAEmbedder(vectorizer, dimensions=int(argument))
+    return SentenceTransformerEmbedder(argument)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class IVFIndex:
+    """Inverted-file ANN index for normalised embeddings.
+
+    Vectors are clustered with k-means into about sqrt(n) lists and
+    stored grouped by list, so a query scores the centroids, then only
+    the `n_probe` closest lists, each a contiguous slice of a memory-mapped
+    array. Collections under `exact_below` vectors get a single list,
+    i.e. exact search, which is still only a few milliseconds there.
+    """
+
+    def __init__(self, centroids, offsets, ids, vectors, n_probe: int = 32):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.n_probe = n_probe
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: int = None, train_size: int = 50000,
+              exact_below: int = 50000) -> 'IVFIndex':
+        n = len(vectors)
+        if n_lists is None:
+            n_lists = 1 if n < exact_below else int(np.sqrt(n))
+        if n_lists <= 1:
+            return cls(_normalize(vectors.mean(axis=0, keepdims=True)), np.array([0, n], dtype=np.int64),
+                       np.arange(n, dtype=np.int64), vectors)
+
+        from sklearn.cluster import MiniBatchKMeans
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(n, size=min(n, train_size), replace=False)]
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, n_init=1, random_state=0, batch_size=4096).fit(sample)
+        centroids = _normalize(kmeans.cluster_centers_.astype(np.float32))
+
+        assignments = np.concatenate([
+            np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+            for start in range(0, n, 65536)
+        ])
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        return cls(centroids, offsets.astype(np.int64), order.astype(np.int64), vectors[order])
+
+    def search(self, query_vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        n_probe = min(self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query_vector
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        ids, scores = [], []
+        for list_id in probe:
+            start, end = self.offsets[list_id], self.offsets[list_id + 1]
+            if start < end:
+                ids.append(self.ids[start:end])
+                scores.append(self.vectors[start:end] @ query_vector)
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return ids[top], scores[top]
+
+    def save(self, directory: str):
+        for name in ('centroids', 'offsets', 'ids', 'vectors'):
+            np.save(os.path.join(directory, f"ivf_{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = 'r') -> 'IVFIndex':
+        return cls(*[
+            np.load(os.path.join(directory, f"ivf_{name}.npy"), mmap_mode=mmap_mode)
+            for name in ('centroids', 'offsets', 'ids', 'vectors')
+        ])
+
+
+class HybridRetriever:
+    """BM25 and dense retrieval fused by reciprocal rank.
+
+    Each retriever contributes its top `candidates`; a chunk scores
+    weight / (rrf_k + rank) summed over the lists it appears in, with
+    `dense_weight` for the embedding list and 1 for BM25.
+    """
+
+    def __init__(self, bm25: BM25Index, embedder, ann: IVFIndex, candidates: int = 50, rrf_k: int = 60,
+                 dense_weight: float = 1.0):
+        self.bm25 = bm25
+        self.embedder = embedder
+        self.ann = ann
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+
+    @classmethod
+    def build(cls, directory: str, chunks, vectorizer, vectors, embedder_spec: str = 'lsa',
+              kb_created_at: str = None) -> 'HybridRetriever':
+        """Index a knowledge base and write the retrieval directory atomically"""
+        embedder = create_embedder(embedder_spec, vectorizer)
+        bm25 = BM25Index.build(chunks, vectorizer.vocabulary_)
+        ann = IVFIndex.build(embedder.fit(chunks, vectors))
+
+        tmp_dir = f"{directory}.tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+        postings = bm25.index
+        np.save(os.path.join(tmp_dir, 'bm25_data.npy'), postings.weights)
+        np.save(os.path.join(tmp_dir, 'bm25_indices.npy'), postings.doc_ids)
+        np.save(os.path.join(tmp_dir, 'bm25_indptr.npy'), postings.indptr)
+        embedder.save(tmp_dir)
+        ann.save(tmp_dir)
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({
+                'format_version': RETRIEVAL_FORMAT_VERSION,
+                'embedder': embedder.spec,
+                'n_chunks': len(chunks),
+                'knowledge_base_created_at': kb_created_at,
+                'created_at': datetime.now().isoformat()
+            }, f)
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+        return cls.load(directory, vectorizer)
+
+    @staticmethod
+    def is_current(directory: str, embedder_spec: str, n_chunks: int, kb_created_at: str = None) -> bool:
+        """Whether `directory` indexes this knowledge base build with this embedder"""
+        meta_file = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_file):
+            return False
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        return (meta.get('format_version') == RETRIEVAL_FORMAT_VERSION
+                and meta.get('embedder') == canonical_embedder_spec(embedder_spec)
+                and meta.get('n_chunks') == n_chunks
+                and meta.get('knowledge_base_created_at') == kb_created_at)
+
+    @classmethod
+    def load(cls, directory: str, vectorizer, mmap_mode: str = 'r') -> 'HybridRetriever':
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        n_docs = meta['n_chunks']
+        postings = sparse.csc_matrix(tuple(
+            np.load(os.path.join(directory, f"bm25_{name}.npy"), mmap_mode=mmap_mode)
+            for name in ('data', 'indices', 'indptr')
+        ), shape=(n_docs, len(vectorizer.vocabulary_)), copy=False)
+        embedder = create_embedder(meta['embedder'], vectorizer)
+        embedder.load(directory)
+        return cls(BM25Index(postings, vectorizer.vocabulary_), embedder, IVFIndex.load(directory, mmap_mode))
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float, float]]:
+        """Top k as (chunk index, fused score, dense similarity)"""
+        fused = {}
+        dense_scores = {}
+        bm25_ids, bm25_scores = self.bm25.search(query, self.candidates)
+        for rank, (idx, score) in enumerate(zip(bm25_ids.tolist(), bm25_scores.tolist())):
+            if score > 0:
+                fused[idx] = fused.get(idx, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        query_vector = self.embedder.embed([query])[0]
+        if np.any(query_vector):
+            dense_ids, similarities = self.ann.search(query_vector, self.candidates)
+            for rank, (idx, similarity) in enumerate(zip(dense_ids.tolist(), similarities.tolist())):
+                if similarity <= 0:
+                    break
+                fused[idx] = fused.get(idx, 0.0) + self.dense_weight / (self.rrf_k + rank + 1)
+                dense_scores[idx] = similarity
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(idx, score, dense_scores.get(idx, 0.0)) for idx, score in ranked]
+
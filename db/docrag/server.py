@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import asyncio
+import time
+import uuid
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+import uvicorn
+from .memory import ConversationMemory
+from .session import CrewSession, NO_RESULTS_MESSAGE
+from .transcript import TranscriptLog
+
+
+class ChatRequest(BaseModel):
+    question: str
+    conversation_id: Optional[str] = None
+
+
+class Conversation:
+    def __init__(self, memory: ConversationMemory):
+        self.memory = memory
+        self.lock = asyncio.Lock()
+
+
+# on_turn(question, answer, conversation_id, sources)
+TurnHook = Callable[[str, str, str, List[Dict]], None]
+
+
+def create_app(chatbot, max_concurrent_llm: int = 4, max_history: int = 5,
+               max_conversations: int = 10000, transcript: Optional[TranscriptLog] = None,
+               on_turn: Optional[TurnHook] = None, metrics_flush_interval: float = 10.0,
+               memory_factory: Optional[Callable[[], ConversationMemory]] = None) -> FastAPI:
+    """HTTP front end for an initialized DocumentationChatbot.
+
+    The chatbot's index is shared read-only by all requests. Retrieval and
+    generation run in worker threads; at most `max_concurrent_llm`
+    generations run at once, each on its own CrewSession from a fixed pool.
+    Turns within one conversation are serialized; its last `max_history`
+    turns feed the prompt verbatim and older ones as a running summary.
+    `memory_factory` builds each new conversation's memory instead, for
+    front ends with their own history length or summarizer.
+    With a `transcript`, every turn of every conversation is logged to it;
+    `on_turn` is called with every answered turn in a worker thread, for
+    front ends that persist turns elsewhere. If the chatbot defines
+    end_request(), it is called after each unit of worker-thread work so
+    per-thread resources such as database sessions go back to their pool.
+    If the chatbot carries enabled Metrics, they are served at /metrics in
+    the Prometheus text format, and if they have a file, it is rewritten
+    every `metrics_flush_interval` seconds and on shutdown.
+    """
+    chatbot_metrics = getattr(chatbot, 'metrics', None)
+    if memory_factory is None:
+        def memory_factory():
+            return ConversationMemory(max_recent=max_history)
+
+    async def flush_metrics():
+        while True:
+            await asyncio.sleep(metrics_flush_interval)
+            await asyncio.to_thread(chatbot_metrics.flush)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        flusher = None
+        if chatbot_metrics is not None and chatbot_metrics.path:
+            flusher = asyncio.create_task(flush_metrics())
+        try:
+            yield
+        finally:
+            if flusher is not None:
+                flusher.cancel()
+                chatbot_metrics.flush()
+
+    app = FastAPI(title="Documentation Chatbot", lifespan=lifespan)
+    conversations = OrderedDict()
+    crew_sessions = asyncio.Queue()
+    for _ in range(max_concurrent_llm):
+        crew_sessions.put_nowait(CrewSession(chatbot.create_agents()))
+
+    def in_request(fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            end_request = getattr(chatbot, 'end_request', None)
+            if end_request:
+                end_request()
+
+    def get_conversation(conversation_id: str) -> Conversation:
+        conversation = conversations.get(conversation_id)
+        if conversation is None:
+            conversation = conversations[conversation_id] = Conversation(memory_factory())
+            while len(conversations) > max_conversations:
+                conversations.popitem(last=False)
+        conversations.move_to_end(conversation_id)
+        return conversation
+
+    @app.get("/health")
+    async def health():
+        return {'status': 'ok', 'conversations': len(conversations)}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        if chatbot_metrics is None or not chatbot_metrics.enabled:
+            return PlainTextResponse("metrics are disabled\n", status_code=404)
+        return chatbot_metrics.prometheus()
+
+    @app.post("/chat")
+    async def chat(request: ChatRequest):
+        conversation_id = request.conversation_id or uuid.uuid4().hex
+        conversation = get_conversation(conversation_id)
+        question = request.question.strip()
+        request_started = time.perf_counter()
+
+        async with conversation.lock:
+            results = await asyncio.to_thread(in_request, chatbot.search, question)
+            relevant = [result for result in results if result['relevance_score'] > 0.1]
+
+            if not relevant:
+                answer = NO_RESULTS_MESSAGE
+            else:
+                crew_session = await crew_sessions.get()
+                try:
+                    response = await asyncio.to_thread(
+                        in_request, chatbot.generate_response, question, results,
+                        memory=conversation.memory, crew_session=crew_session
+                    )
+                finally:
+                    crew_sessions.put_nowait(crew_session)
+                answer = str(response)
+                turn = {'question': question, 'answer': answer, 'timestamp': datetime.now().isoformat()}
+                conversation.memory.add(**turn)
+                if transcript:
+                    await asyncio.to_thread(transcript.append, dict(turn, conversation_id=conversation_id))
+                if on_turn:
+                    await asyncio.to_thread(in_request, on_turn, question, answer, conversation_id, relevant)
+
+        if chatbot_metrics is not None:
+            chatbot_metrics.observe_stage('request', time.perf_counter() - request_started)
+            chatbot_metrics.inc('requests_total')
+        return {
+            'conversation_id': conversation_id,
+            'answer': answer,
+            'sources': [{'title': result['title'], 'url': result['url']} for result in relevant[:3]]
+        }
+
+    return app
+
+
+def serve(chatbot, host: str = "127.0.0.1", port: int = 8000, max_concurrent_llm: int = 4,
+          transcript: Optional[TranscriptLog] = None, on_turn: Optional[TurnHook] = None,
+          memory_factory: Optional[Callable[[], ConversationMemory]] = None):
+    uvicorn.run(create_app(chatbot, max_concurrent_llm=max_concurrent_llm, transcript=transcript, on_turn=on_turn,
+                           memory_factory=memory_factory),
+                host=host, port=port)
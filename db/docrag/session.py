@@ -0,0 +1,99 @@
+from typing import Callable, Optional
+from crewai import Crew, Task
+from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+
+ANSWER_TASK_DESCRIPTION = """
+            Answer the following question using the provided context.
+            Question: {query}
+            
+            Context:
+            {context}
+            
+            Previous conversation:
+            {history}
+            """
+
+ANSWER_EXPECTED_OUTPUT = "A detailed answer to the user's question based on the provided context."
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+NO_RESULTS_MESSAGE = ("I couldn't find any relevant information in the documentation. "
+                      "Could you please rephrase your question or ask about a different topic?")
+
+
+class FinalAnswerStream:
+    """Forwards streamed LLM text that follows the agent's "Final Answer:" marker.
+
+    The agent reasons in a Thought/Final Answer format; only the answer part
+    is meant for the user, so everything before the marker is held back.
+    """
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+        self.buffer = ''
+        self.started = False
+
+    def feed(self, chunk: str):
+        if self.started:
+            self._emit(chunk)
+            return
+        self.buffer += chunk
+        marker_at = self.buffer.find(FINAL_ANSWER_MARKER)
+        if marker_at >= 0:
+            self.started = True
+            self._emit(self.buffer[marker_at + len(FINAL_ANSWER_MARKER):].lstrip())
+            self.buffer = ''
+
+    def _emit(self, text: str):
+        if text:
+            self.on_token(text)
+
+
+class CrewSession:
+    """One agent, task and crew reused for every turn of a conversation.
+
+    The task description is a template; `Crew.kickoff(inputs=...)`
+    re-interpolates it from the original each turn, so a turn only swaps in
+    the question, context and history instead of rebuilding the agent,
+    its prompt templates and the LLM client.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self.task = Task(
+            description=ANSWER_TASK_DESCRIPTION,
+            expected_output=ANSWER_EXPECTED_OUTPUT,
+            agent=agent
+        )
+        self.crew = Crew(
+            agents=[agent],
+            tasks=[self.task]
+        )
+
+    def answer(self, query: str, context: str, history: str,
+               on_token: Optional[Callable[[str], None]] = None):
+        """Run one turn; with `on_token`, answer text is passed on as the LLM streams it.
+
+        Streaming needs an LLM created with stream=True. The crew output is
+        returned either way.
+        """
+        inputs = {
+            'query': query,
+            'context': context,
+            'history': history
+        }
+        if on_token is None:
+            return self.crew.kickoff(inputs=inputs)
+
+        stream = FinalAnswerStream(on_token)
+        agent_id = str(self.agent.id)
+
+        def forward_chunk(source, event):
+            if event.agent_id == agent_id and event.tool_call is None:
+                stream.feed(event.chunk)
+
+        crewai_event_bus.on(LLMStreamChunkEvent)(forward_chunk)
+        try:
+            return self.crew.kickoff(inputs=inputs)
+        finally:
+            crewai_event_bus.off(LLMStreamChunkEvent, forward_chunk)
@@ -0,0 +1,199 @@
+from datetime import datetime
+from typing import Dict, List
+import json
+import os
+import shutil
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# Bump when the on-disk layout changes; loaders refuse versions they don't know
+FORMAT_VERSION = 1
+
+# Layout of a knowledge base directory:
+#   meta.json            format version, matrix shape, build time
+#   vocabulary.json      terms ordered by their column index
+#   idf.npy              IDF weight per column
+#   vectors_*.npy        document-term matrix, CSR (row per chunk)
+#   postings_*.npy       the same matrix, CSC (posting list per term)
+#   chunks.bin           UTF-8 chunk texts back to back
+#   chunk_offsets.npy    byte offset of each chunk in chunks.bin (n + 1 entries)
+#   pages.json           [url, title] per page
+#   chunk_pages.npy      page index of each chunk
+#   page_state.json      per-page validators, content hash and links (optional)
+
+
+class ChunkTexts:
+    """Read-only sequence of chunk texts decoded lazily from a memory map"""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return bytes(self._blob[start:end]).decode('utf-8')
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+class ChunkMetadata:
+    """Read-only sequence of {'url', 'title'} dicts backed by a page table"""
+
+    def __init__(self, pages, chunk_pages):
+        self._pages = pages
+        self._chunk_pages = chunk_pages
+
+    def __len__(self):
+        return len(self._chunk_pages)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        url, title = self._pages[self._chunk_pages[idx]]
+        return {'url': url, 'title': title}
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+
+def vectorizer_terms(vectorizer) -> List[str]:
+    """Vocabulary of a fitted vectorizer as a list ordered by column index"""
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        terms[column] = term
+    return terms
+
+
+def build_vectorizer(terms: List[str], idf) -> TfidfVectorizer:
+    """Rebuild a fitted TfidfVectorizer from its stored vocabulary and IDF weights"""
+    vectorizer = TfidfVectorizer()
+    vectorizer.vocabulary_ = {term: column for column, term in enumerate(terms)}
+    vectorizer.idf_ = np.asarray(idf, dtype=np.float64)
+    return vectorizer
+
+
+def _save_matrix(directory: str, prefix: str, matrix):
+    np.save(os.path.join(directory, f"{prefix}_data.npy"), matrix.data)
+    np.save(os.path.join(directory, f"{prefix}_indices.npy"), matrix.indices)
+    np.save(os.path.join(directory, f"{prefix}_indptr.npy"), matrix.indptr)
+
+
+def _load_matrix(directory: str, prefix: str, shape, fmt, mmap_mode):
+    arrays = [
+        np.load(os.path.join(directory, f"{prefix}_{name}.npy"), mmap_mode=mmap_mode)
+        for name in ('data', 'indices', 'indptr')
+    ]
+    return fmt(tuple(arrays), shape=shape, copy=False)
+
+
+def save_knowledge_base(directory: str, chunks: List[str], chunk_metadata: List[Dict], vectorizer, vectors,
+                        page_state: Dict = None):
+    """Write a knowledge base directory, replacing any previous one atomically"""
+    tmp_dir = f"{directory}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    vectors = sparse.csr_matrix(vectors)
+    vectors.sort_indices()
+    postings = vectors.tocsc()
+    postings.sort_indices()
+    _save_matrix(tmp_dir, 'vectors', vectors)
+    _save_matrix(tmp_dir, 'postings', postings)
+
+    with open(os.path.join(tmp_dir, 'vocabulary.json'), 'w') as f:
+        json.dump(vectorizer_terms(vectorizer), f)
+    np.save(os.path.join(tmp_dir, 'idf.npy'), np.asarray(vectorizer.idf_))
+
+    offsets = [0]
+    with open(os.path.join(tmp_dir, 'chunks.bin'), 'wb') as f:
+        for chunk in chunks:
+            encoded = chunk.encode('utf-8')
+            f.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+    np.save(os.path.join(tmp_dir, 'chunk_offsets.npy'), np.array(offsets, dtype=np.int64))
+
+    pages = []
+    page_ids = {}
+    chunk_pages = []
+    for meta in chunk_metadata:
+        key = (meta['url'], meta['title'])
+        if key not in page_ids:
+            page_ids[key] = len(pages)
+            pages.append(list(key))
+        chunk_pages.append(page_ids[key])
+    with open(os.path.join(tmp_dir, 'pages.json'), 'w') as f:
+        json.dump(pages, f)
+    np.save(os.path.join(tmp_dir, 'chunk_pages.npy'), np.array(chunk_pages, dtype=np.int32))
+
+    if page_state:
+        with open(os.path.join(tmp_dir, 'page_state.json'), 'w') as f:
+            json.dump(page_state, f)
+
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'format_version': FORMAT_VERSION,
+            'shape': list(vectors.shape),
+            'created_at': datetime.now().isoformat()
+        }, f)
+
+    # Swap the finished directory into place so readers never see a partial write
+    old_dir = f"{directory}.old"
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+
+
+def load_knowledge_base(directory: str, mmap_mode: str = 'r') -> Dict:
+    """Memory-map a knowledge base directory written by save_knowledge_base"""
+    with open(os.path.join(directory, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported knowledge base format {meta.get('format_version')} in {directory}, "
+            f"expected {FORMAT_VERSION}; delete it to rebuild"
+        )
+    shape = tuple(meta['shape'])
+
+    with open(os.path.join(directory, 'vocabulary.json'), 'r') as f:
+        terms = json.load(f)
+    vectorizer = build_vectorizer(terms, np.load(os.path.join(directory, 'idf.npy')))
+
+    with open(os.path.join(directory, 'pages.json'), 'r') as f:
+        pages = json.load(f)
+
+    page_state = {}
+    page_state_file = os.path.join(directory, 'page_state.json')
+    if os.path.exists(page_state_file):
+        with open(page_state_file, 'r') as f:
+            page_state = json.load(f)
+
+    return {
+        'chunks': ChunkTexts(
+            np.memmap(os.path.join(directory, 'chunks.bin'), dtype=np.uint8, mode='r')
+            if os.path.getsize(os.path.join(directory, 'chunks.bin')) else np.empty(0, dtype=np.uint8),
+            np.load(os.path.join(directory, 'chunk_offsets.npy'), mmap_mode=mmap_mode)
+        ),
+        'metadata': ChunkMetadata(
+            [tuple(page) for page in pages],
+            np.load(os.path.join(directory, 'chunk_pages.npy'), mmap_mode=mmap_mode)
+        ),
+        'vectorizer': vectorizer,
+        'vectors': _load_matrix(directory, 'vectors', shape, sparse.csr_matrix, mmap_mode),
+        'postings': _load_matrix(directory, 'postings', shape, sparse.csc_matrix, mmap_mode),
+        'page_state': page_state,
+        'meta': meta
+    }
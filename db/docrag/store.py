@@ -0,0 +1,261 @@
+from datetime import datetime
+from typing import Dict
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from .storage import build_vectorizer, load_knowledge_base, save_knowledge_base, vectorizer_terms
+
+# A knowledge base ("corpus") is passed between stores and front ends as a dict:
+#   chunks      sequence of chunk texts, unique by content
+#   metadata    {'url', 'title'} per chunk
+#   vectorizer  fitted TfidfVectorizer
+#   vectors     CSR document-term matrix, row per chunk
+#   page_state  per-page crawl validators (may be empty)
+#   meta        at least 'created_at', the time this corpus was built
+
+
+def content_hash(text: str) -> str:
+    """Content address of a chunk"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def deduplicate_chunks(chunks, chunk_metadata, vectors=None):
+    """Keep the first chunk of each distinct text; returns (chunks, metadata, vectors, duplicates)"""
+    seen = set()
+    keep = []
+    for i, chunk in enumerate(chunks):
+        key = content_hash(chunk)
+        if key not in seen:
+            seen.add(key)
+            keep.append(i)
+    duplicates = len(chunks) - len(keep)
+    if not duplicates:
+        return chunks, chunk_metadata, vectors, 0
+    if vectors is not None:
+        vectors = sparse.csr_matrix(vectors)[keep]
+    return [chunks[i] for i in keep], [chunk_metadata[i] for i in keep], vectors, duplicates
+
+
+def build_corpus(content_store: Dict, page_state: Dict = None) -> Dict:
+    """Deduplicate crawled chunks by content and vectorize them, once for every front end"""
+    chunks, metadata = [], []
+    for url, data in content_store.items():
+        for chunk in data['chunks']:
+            chunks.append(chunk)
+            metadata.append({'url': url, 'title': data['title']})
+    chunks, metadata, _, duplicates = deduplicate_chunks(chunks, metadata)
+    if duplicates:
+        print(f"Dropped {duplicates} duplicate chunks")
+
+    vectorizer = TfidfVectorizer()
+    vectors = vectorizer.fit_transform(chunks).tocsr()
+    return {
+        'chunks': chunks,
+        'metadata': metadata,
+        'vectorizer': vectorizer,
+        'vectors': vectors,
+        'page_state': page_state or {},
+        'meta': {'created_at': datetime.now().isoformat()}
+    }
+
+
+def store_home() -> str:
+    """Directory shared by all front ends; $DOCRAG_HOME or ~/.cache/docrag"""
+    return os.environ.get('DOCRAG_HOME') or os.path.join(os.path.expanduser('~'), '.cache', 'docrag')
+
+
+def site_slug(base_url: str) -> str:
+    """File-name-safe name for a site, the same on every platform"""
+    return re.sub(r'[^A-Za-z0-9.-]+', '_', base_url).strip('_')
+
+
+def default_store_spec(base_url: str) -> str:
+    return 'file:' + os.path.join(store_home(), f"knowledge_base_{site_slug(base_url)}")
+
+
+def default_checkpoint_path(base_url: str) -> str:
+    """Where an unfinished crawl of the site keeps its progress"""
+    return os.path.join(store_home(), f"crawl_{site_slug(base_url)}.sqlite")
+
+
+def default_cache_path(base_url: str) -> str:
+    """Where answers about the site are cached; shared by the front ends like the knowledge base"""
+    return os.path.join(store_home(), f"response_cache_{site_slug(base_url)}.sqlite3")
+
+
+def open_store(spec: str):
+    """'file:<directory>', 'sqlite:<path>' or a postgresql:// URL"""
+    if spec.startswith('file:'):
+        return FileStore(spec[len('file:'):])
+    if spec.startswith('sqlite:'):
+        return SQLiteStore(spec[len('sqlite:'):])
+    if spec.startswith('postgresql'):
+        # SQLAlchemy is only needed for this backend
+        from .pg import PostgresStore
+        return PostgresStore(spec)
+    raise ValueError(f"Unknown store {spec!r}; use file:<dir>, sqlite:<path> or postgresql://...")
+
+
+class FileStore:
+    """Memory-mapped knowledge base directory (see storage.py)"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __repr__(self):
+        return f"file:{self.directory}"
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.directory, 'meta.json'))
+
+    def load(self) -> Dict:
+        return load_knowledge_base(self.directory)
+
+    def save(self, corpus: Dict):
+        parent = os.path.dirname(self.directory)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        save_knowledge_base(self.directory, corpus['chunks'], corpus['metadata'], corpus['vectorizer'],
+                            corpus['vectors'], page_state=corpus.get('page_state'))
+
+
+def _array_blob(array) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(array))
+    return buffer.getvalue()
+
+
+def _blob_array(blob: bytes):
+    return np.load(io.BytesIO(blob))
+
+
+class SQLiteStore:
+    """Single-file knowledge base; chunks are stored once per distinct content hash"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __repr__(self):
+        return f"sqlite:{self.path}"
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                hash TEXT NOT NULL UNIQUE,
+                page_id INTEGER NOT NULL REFERENCES pages (id),
+                content TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS arrays (
+                name TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        return conn
+
+    def exists(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'created_at'").fetchone() is not None
+        finally:
+            conn.close()
+
+    def save(self, corpus: Dict):
+        vectors = sparse.csr_matrix(corpus['vectors'])
+        vectors.sort_indices()
+        page_ids = {}
+        conn = self._connect()
+        try:
+            with conn:
+                for table in ('chunks', 'pages', 'arrays', 'meta'):
+                    conn.execute(f"DELETE FROM {table}")
+                chunk_rows = []
+                for row, (chunk, meta) in enumerate(zip(corpus['chunks'], corpus['metadata'])):
+                    key = (meta['url'], meta['title'])
+                    if key not in page_ids:
+                        page_ids[key] = len(page_ids)
+                    chunk_rows.append((row, content_hash(chunk), page_ids[key], chunk))
+                conn.executemany("INSERT INTO pages VALUES (?, ?, ?)",
+                                 [(page_id, url, title) for (url, title), page_id in page_ids.items()])
+                conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", chunk_rows)
+                conn.executemany("INSERT INTO arrays VALUES (?, ?)", [
+                    ('idf', _array_blob(corpus['vectorizer'].idf_)),
+                    ('vectors_data', _array_blob(vectors.data)),
+                    ('vectors_indices', _array_blob(vectors.indices)),
+                    ('vectors_indptr', _array_blob(vectors.indptr))
+                ])
+                conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                    ('vocabulary', json.dumps(vectorizer_terms(corpus['vectorizer']))),
+                    ('shape', json.dumps(list(vectors.shape))),
+                    ('page_state', json.dumps(corpus.get('page_state') or {})),
+                    ('created_at', corpus.get('meta', {}).get('created_at') or datetime.now().isoformat())
+                ])
+        finally:
+            conn.close()
+
+    def load(self) -> Dict:
+        conn = self._connect()
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            arrays = {name: _blob_array(data) for name, data in conn.execute("SELECT name, data FROM arrays")}
+            pages = {page_id: (url, title) for page_id, url, title in conn.execute("SELECT id, url, title FROM pages")}
+            chunks, metadata = [], []
+            for content, page_id in conn.execute("SELECT content, page_id FROM chunks ORDER BY id"):
+                url, title = pages[page_id]
+                chunks.append(content)
+                metadata.append({'url': url, 'title': title})
+        finally:
+            conn.close()
+
+        vectors = sparse.csr_matrix(
+            (arrays['vectors_data'], arrays['vectors_indices'], arrays['vectors_indptr']),
+            shape=tuple(json.loads(meta['shape']))
+        )
+        return {
+            'chunks': chunks,
+            'metadata': metadata,
+            'vectorizer': build_vectorizer(json.loads(meta['vocabulary']), arrays['idf']),
+            'vectors': vectors,
+            'postings': vectors.tocsc(),
+            'page_state': json.loads(meta['page_state']),
+            'meta': {'created_at': meta['created_at']}
+        }
+
+
+def obtain_corpus(base_url: str, crawler, shared_store=None) -> Dict:
+    """The site's corpus from `shared_store`, crawled and vectorized into it first when it has none.
+
+    Every front end pointed at the same shared store therefore crawls and
+    vectorizes a site once between them. The crawler's checkpoint is
+    discarded only once the corpus is saved, so a crawl that dies before
+    that point resumes on the next call.
+    """
+    if shared_store is not None and shared_store.exists():
+        print(f"Reusing knowledge base from {shared_store!r}...")
+        return shared_store.load()
+
+    print("Building new knowledge base...")
+    crawler.crawl(base_url)
+    corpus = build_corpus(crawler.content_store, crawler.page_state)
+    if shared_store is not None:
+        shared_store.save(corpus)
+    crawler.discard_checkpoint()
+    return corpus
@@ -0,0 +1,144 @@
+from typing import Dict, Iterable, Iterator, List
+import argparse
+import json
+import os
+import threading
+import time
+
+
+class TranscriptLog:
+    """Append-only JSONL log of chat turns.
+
+    Every turn is written and flushed as soon as it is added, so a crashed
+    process loses nothing. fsync is batched: it runs once `fsync_every`
+    turns are waiting, and a background timer syncs any turn still waiting
+    `fsync_interval` seconds after it was added, even if no other turn
+    follows. That bounds what an OS crash or power loss can take.
+    Appending costs the same however long the transcript is.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 8, fsync_interval: float = 2.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._timer = None
+
+    def append(self, turn: Dict):
+        line = json.dumps(turn, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self._sync_if_waiting)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _sync_if_waiting(self):
+        with self._lock:
+            self._timer = None
+            if self._unsynced and not self._file.closed:
+                self._sync()
+
+    def sync(self):
+        """Force everything appended so far to disk"""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __iter__(self) -> Iterator[Dict]:
+        return read_transcript(self.path)
+
+
+def read_transcript(path: str) -> Iterator[Dict]:
+    """Turns of a transcript in order; a torn last line from a crash is skipped"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def compact(paths: Iterable[str], output: str) -> int:
+    """Merge transcripts into one, dropping torn lines and repeated turns"""
+    seen = set()
+    turns = []
+    for path in paths:
+        for turn in read_transcript(path):
+            key = json.dumps(turn, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                turns.append(turn)
+    turns.sort(key=lambda turn: turn.get('timestamp', ''))
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for turn in turns:
+            f.write(json.dumps(turn, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output)
+    return len(turns)
+
+
+def export(paths: Iterable[str], output: str, fmt: str = 'json') -> int:
+    """Write transcripts as one JSON array (the old chat_history format) or Markdown"""
+    turns: List[Dict] = [turn for path in paths for turn in read_transcript(path)]
+    with open(output, 'w', encoding='utf-8') as f:
+        if fmt == 'json':
+            json.dump(turns, f, indent=2, ensure_ascii=False)
+        else:
+            for turn in turns:
+                f.write(f"### {turn['question']}\n")
+                if turn.get('timestamp'):
+                    f.write(f"*{turn['timestamp']}*\n")
+                f.write(f"\n{turn['answer']}\n\n")
+    return len(turns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact or export chat transcripts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help="merge transcripts into one JSONL file")
+    compact_parser.add_argument('transcripts', nargs='+')
+    compact_parser.add_argument('-o', '--output', required=True)
+
+    export_parser = subparsers.add_parser('export', help="write transcripts as JSON or Markdown")
+    export_parser.add_argument('transcripts', nargs='+')
+    export_parser.add_argument('-o', '--output', required=True)
+    export_parser.add_argument('--format', choices=['json', 'markdown'], default='json')
+
+    args = parser.parse_args()
+    if args.command == 'compact':
+        count = compact(args.transcripts, args.output)
+    else:
+        count = export(args.transcripts, args.output, args.format)
+    print(f"Wrote {count} turns to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from fnmatch import fnmatchcase
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+import posixpath
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+INDEX_PAGES = ('index.html', 'index.htm')
+# Query parameters that track where a visitor came from rather than select content; shell-style patterns
+TRACKING_PARAMETERS = ('utm_*', 'gclid', 'gclsrc', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+                       '_ga', '_gl', '_hsenc', '_hsmi', 'igshid', 'ref', 'ref_src')
+
+
+def resolve_url(url: str, base: str = None) -> Optional[str]:
+    """`url` resolved against `base` and without its fragment, as it is fetched; None unless http(s)"""
+    if base:
+        url = urljoin(base, url)
+    url = urldefrag(url.strip())[0]
+    if urlsplit(url).scheme.lower() not in DEFAULT_PORTS:
+        return None
+    return url
+
+
+def canonicalize_url(url: str, base: str = None,
+                     query_denylist: Iterable[str] = TRACKING_PARAMETERS) -> Optional[str]:
+    """One spelling per page: the key the crawler dedups and stores pages under.
+
+    Only a key: the page is still fetched at the URL it was linked as,
+    since a server may redirect `dir` to `dir/` or resolve relative links
+    differently without the trailing slash.
+
+    Resolves `url` against `base`, lowercases scheme and host, drops
+    default ports, fragments, dot segments, index.html, repeated and
+    trailing slashes, and the query parameters matching a pattern in
+    `query_denylist` (tracking parameters by default). The remaining
+    parameters may select content, as `?page=2` or `?version=3` do, so
+    they are kept, sorted. Returns None for anything that is not an
+    http(s) URL.
+    """
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+
+    path = posixpath.normpath('/' + parts.path.lstrip('/')) if parts.path else '/'
+    if path.startswith('//'):
+        path = path[1:]
+    if posixpath.basename(path) in INDEX_PAGES:
+        path = posixpath.dirname(path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    denylist = tuple(query_denylist)
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not any(fnmatchcase(key.lower(), pattern) for pattern in denylist)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def in_scope(url: str, scope: str) -> bool:
+    """Whether canonical `url` is `scope` or below it; both are canonical"""
+    if url == scope:
+        return True
+    return url.startswith(scope if scope.endswith('/') else scope + '/')
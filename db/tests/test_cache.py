@@ -0,0 +1,80 @@
+import os
+import sys
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag import cache
+from docrag.cache import ResponseCache
+
+CHUNKS = ['chunk-1', 'chunk-2']
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, 'time', clock)
+    return clock
+
+
+def test_hit_needs_same_question_chunks_and_history(tmp_path, clock):
+    responses = ResponseCache(str(tmp_path / 'cache.sqlite3'))
+    responses.put('How do I log in?', CHUNKS, 'history', 'Use a token.')
+
+    assert responses.get('how do I log in', CHUNKS, 'history') == 'Use a token.'
+    assert responses.get('How do I log in?', CHUNKS[:1], 'history') is None
+    assert responses.get('How do I log in?', CHUNKS, 'other history') is None
+
+
+def test_entries_expire(tmp_path, clock):
+    responses = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttl_seconds=60)
+    responses.put('q', CHUNKS, '', 'answer')
+
+    clock.now += 59
+    assert responses.get('q', CHUNKS, '') == 'answer'
+    clock.now += 2
+    assert responses.get('q', CHUNKS, '') is None
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    responses = ResponseCache(str(tmp_path / 'cache.sqlite3'), max_entries=2)
+    responses.put('first', CHUNKS, '', 'answer 1')
+    clock.now += 1
+    responses.put('second', CHUNKS, '', 'answer 2')
+    clock.now += 1
+    assert responses.get('first', CHUNKS, '') == 'answer 1'
+    clock.now += 1
+    responses.put('third', CHUNKS, '', 'answer 3')
+
+    assert responses.get('first', CHUNKS, '') == 'answer 1'
+    assert responses.get('second', CHUNKS, '') is None
+    assert responses.get('third', CHUNKS, '') == 'answer 3'
+
+
+def test_similar_question_hits_above_threshold(tmp_path, clock):
+    vectorizer = TfidfVectorizer().fit(['how do i authenticate requests', 'how do i paginate results',
+                                        'authenticate with an api key'])
+    responses = ResponseCache(str(tmp_path / 'cache.sqlite3'), similarity_threshold=0.8)
+    question = 'How do I authenticate requests?'
+    responses.put(question, CHUNKS, '', 'Send the key.', vectorizer.transform([question]))
+
+    similar = 'how do I authenticate my requests'
+    assert responses.get(similar, CHUNKS, '', vectorizer.transform([similar])) == 'Send the key.'
+    different = 'how do I paginate results'
+    assert responses.get(different, CHUNKS, '', vectorizer.transform([different])) is None
+
+
+def test_cache_directory_is_created(tmp_path):
+    responses = ResponseCache(str(tmp_path / 'home' / 'response_cache_example.com.sqlite3'))
+    responses.put('q', CHUNKS, '', 'answer')
+    assert responses.get('q', CHUNKS, '') == 'answer'
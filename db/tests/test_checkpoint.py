@@ -0,0 +1,66 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag.checkpoint import CrawlCheckpoint
+
+SCOPE = 'https://example.com/docs'
+
+
+def _interrupted_crawl(path):
+    """A crawl that fetched one page and died with two URLs queued and one page uncommitted"""
+    checkpoint = CrawlCheckpoint(path)
+    assert checkpoint.load(SCOPE) is None
+    checkpoint.reset(SCOPE)
+    checkpoint.queue([f"{SCOPE}/", f"{SCOPE}/a", f"{SCOPE}/b"])
+    checkpoint.record(SCOPE, {'chunks': ['Home'], 'title': 'Home'}, {'content_hash': 'h'}, unchanged=False)
+    checkpoint.record(f"{SCOPE}/old", None, {'content_hash': 'o'}, unchanged=True)
+    checkpoint.mark_done([f"{SCOPE}/", SCOPE, f"{SCOPE}/old"])
+    checkpoint.commit()
+    checkpoint.record(f"{SCOPE}/a", {'chunks': ['A'], 'title': 'A'}, {'content_hash': 'a'}, unchanged=False)
+    checkpoint.mark_done([f"{SCOPE}/a"])
+    # The process dies here: the last page was never committed
+    checkpoint._connection.close()
+
+
+def test_resume_after_a_crash(tmp_path):
+    path = str(tmp_path / 'crawl.sqlite')
+    _interrupted_crawl(path)
+
+    resumed = CrawlCheckpoint(path).load(SCOPE)
+    assert resumed['frontier'] == [f"{SCOPE}/a", f"{SCOPE}/b"]
+    assert resumed['visited'] == {f"{SCOPE}/", SCOPE, f"{SCOPE}/old"}
+    assert resumed['content_store'] == {SCOPE: {'chunks': ['Home'], 'title': 'Home'}}
+    assert resumed['page_state'] == {SCOPE: {'content_hash': 'h'}, f"{SCOPE}/old": {'content_hash': 'o'}}
+    assert resumed['unchanged_urls'] == {f"{SCOPE}/old"}
+
+
+def test_urls_queued_after_a_resume_keep_their_order(tmp_path):
+    path = str(tmp_path / 'crawl.sqlite')
+    _interrupted_crawl(path)
+
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.load(SCOPE)
+    checkpoint.queue([f"{SCOPE}/c", f"{SCOPE}/a"])
+    checkpoint.close()
+    assert CrawlCheckpoint(path).load(SCOPE)['frontier'] == [f"{SCOPE}/a", f"{SCOPE}/b", f"{SCOPE}/c"]
+
+
+def test_checkpoint_of_another_scope_is_discarded(tmp_path):
+    path = str(tmp_path / 'crawl.sqlite')
+    _interrupted_crawl(path)
+
+    assert CrawlCheckpoint(path).load('https://example.com/blog') is None
+    assert CrawlCheckpoint(path).load(SCOPE) is None
+
+
+def test_discard_removes_the_files(tmp_path):
+    path = str(tmp_path / 'crawl.sqlite')
+    _interrupted_crawl(path)
+
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.load(SCOPE)
+    checkpoint.discard()
+    assert os.listdir(tmp_path) == []
+    assert CrawlCheckpoint(path).load(SCOPE) is None
@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag import Chunker
+from docrag.chunking import _TOKEN_RE, count_tokens
+
+SENTENCES = ' '.join(f"Sentence number {i} describes one more option of the API." for i in range(40))
+
+
+def test_small_blocks_share_a_chunk():
+    chunks = list(Chunker(max_tokens=50, overlap_tokens=5).chunk([('text', 'First paragraph.'),
+                                                                  ('text', 'Second paragraph.')]))
+    assert chunks == ['First paragraph.\n\nSecond paragraph.']
+
+
+def test_headings_start_chunks_and_are_repeated():
+    blocks = [('heading', 'Install'), ('text', SENTENCES), ('heading', 'Usage'), ('text', 'Call it.')]
+    chunks = list(Chunker(max_tokens=60, overlap_tokens=10).chunk(blocks))
+
+    install = [chunk for chunk in chunks if chunk.startswith('Install\n\n')]
+    assert len(install) > 1
+    assert chunks[len(install):] == ['Usage\n\nCall it.']
+    assert all('Usage' not in chunk for chunk in install)
+
+
+@pytest.mark.parametrize('kind, text', [
+    ('text', SENTENCES),
+    ('text', ' '.join(['word'] * 500)),
+    ('text', 'See https://example.com/' + '/'.join(f"segment{i}" for i in range(200)) + ' for details.'),
+    ('code', '\n'.join(f"print({i}, 'line', {i})" for i in range(100))),
+])
+def test_chunks_stay_within_budget(kind, text):
+    chunker = Chunker(max_tokens=40, overlap_tokens=8)
+    chunks = list(chunker.chunk([('heading', 'Reference'), (kind, text)]))
+
+    assert all(count_tokens(chunk) <= 40 for chunk in chunks)
+    assert all(chunk.strip() != 'Reference' for chunk in chunks)
+    # Nothing is lost, even where a long URL was cut between its tokens
+    assert set(_TOKEN_RE.findall(text)) <= set(_TOKEN_RE.findall(' '.join(chunks)))
+
+
+def test_consecutive_chunks_overlap():
+    chunks = list(Chunker(max_tokens=40, overlap_tokens=15).chunk([('text', SENTENCES)]))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_sentence = previous.rsplit('. ', 1)[-1]
+        assert chunk.startswith(last_sentence)
+
+
+def test_blank_lines_are_dropped():
+    code = 'a = 1\n\n\n' + '\n'.join(f"b{i} = {i}" for i in range(30))
+    chunks = list(Chunker(max_tokens=20, overlap_tokens=4).chunk([('code', code)]))
+    assert all(line.strip() for chunk in chunks for line in chunk.split('\n'))
+
+
+def test_overlap_must_be_smaller_than_budget():
+    with pytest.raises(ValueError):
+        Chunker(max_tokens=10, overlap_tokens=10)
@@ -0,0 +1,146 @@
+import functools
+import os
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag import DocumentationCrawler
+from docrag.refresh import apply_crawl_changes
+from docrag.store import build_corpus
+
+GUIDE = ' '.join(f"Step {i} explains how the crawler treats page number {i} of the guide." for i in range(60))
+
+PAGES = {
+    'index.html': '<title>Home</title><main><p>Welcome to the documentation home page.</p>'
+                  '<a href="docs/">Docs</a> <a href="docs/#top">Docs again</a></main>',
+    'docs/index.html': '<title>Docs</title><main><p>Documentation index with relative links.</p>'
+                       '<a href="page1.html">Page 1</a> <a href="guide.html">Guide</a> '
+                       '<a href="guide-print.html">Printable guide</a></main>',
+    'docs/page1.html': '<title>Page 1</title><main><p>The first page, linked relative to its directory.</p></main>',
+    'docs/guide.html': f'<title>Guide</title><main><p>{GUIDE}</p></main>',
+    'docs/guide-print.html': f'<title>Guide (print)</title><main><p>{GUIDE} Printed.</p></main>',
+}
+
+
+class _RecordingHandler(SimpleHTTPRequestHandler):
+    """Serves the site quietly, recording each request's path on the server; paths in its `failing` answer 500"""
+
+    def do_GET(self):
+        if self.path in self.server.failing:
+            self.send_error(500, explain='Service temporarily unavailable, maintenance.')
+        else:
+            super().do_GET()
+
+    def log_request(self, code='-', size='-'):
+        self.server.paths.append(self.path)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    for path, html in PAGES.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(f'<!DOCTYPE html><html><head>{html}</body></html>'.replace('<main>', '</head><body><main>'))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_RecordingHandler, directory=str(tmp_path)))
+    server.paths = []
+    server.failing = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", server
+    server.shutdown()
+    server.server_close()
+
+
+def _crawl(base_url, page_state=None):
+    crawler = DocumentationCrawler(base_url, page_state=page_state, requests_per_second=1000, use_sitemaps=False)
+    crawler.crawl(base_url)
+    return crawler
+
+
+def test_directory_pages_are_fetched_as_linked(site):
+    site, server = site
+    paths = server.paths
+    crawler = _crawl(site)
+
+    guides = {f"{site}docs/guide.html", f"{site}docs/guide-print.html"}
+    # robots.txt and each page once, with no redirect from docs to docs/
+    assert sorted(paths) == sorted(['/robots.txt', '/', '/docs/', '/docs/page1.html', '/docs/guide.html',
+                                    '/docs/guide-print.html'])
+    assert crawler.stats['requests'] == len(paths)
+    assert set(crawler.content_store) - guides == {site, f"{site}docs", f"{site}docs/page1.html"}
+    # Whichever of the two guides finishes first is kept; the other is its near-duplicate
+    (kept,) = guides & set(crawler.content_store)
+    (duplicate,) = guides - {kept}
+    assert crawler.page_state[duplicate]['duplicate_of'] == kept
+
+
+def test_refreshing_an_unchanged_site_keeps_every_page(site):
+    site, _ = site
+    crawler = _crawl(site)
+    corpus = build_corpus(crawler.content_store, crawler.page_state)
+    chunks, metadata, vectors = corpus['chunks'], corpus['metadata'], corpus['vectors']
+    page_state = corpus['page_state']
+
+    for _ in range(2):
+        crawler = _crawl(site, page_state)
+        chunks, metadata, vectors, stats = apply_crawl_changes(chunks, metadata, vectors, corpus['vectorizer'],
+                                                               crawler)
+        page_state = crawler.page_state
+
+        assert stats == {'changed': 0, 'unchanged': 4, 'removed': 0}
+        assert len(crawler.duplicate_urls) == 1
+        assert not any('removed_at' in state for state in page_state.values())
+        assert len(chunks) == len(corpus['chunks'])
+
+
+def test_error_pages_are_not_stored(site):
+    site, server = site
+    page = f"{site}docs/page1.html"
+    crawler = _crawl(site)
+    corpus = build_corpus(crawler.content_store, crawler.page_state)
+
+    server.failing.add('/docs/page1.html')
+    assert page not in _crawl(site).content_store
+
+    # On refresh the page keeps its chunks and state until it can be fetched again
+    crawler = _crawl(site, corpus['page_state'])
+    chunks, metadata, _, stats = apply_crawl_changes(corpus['chunks'], corpus['metadata'], corpus['vectors'],
+                                                     corpus['vectorizer'], crawler)
+    assert page not in crawler.content_store
+    assert crawler.page_state[page] == corpus['page_state'][page]
+    assert stats['removed'] == 0
+    assert [meta['url'] for meta in metadata].count(page) == [meta['url'] for meta in corpus['metadata']].count(page)
+
+
+def test_interrupted_crawl_resumes_from_its_checkpoint(site, tmp_path):
+    site, server = site
+    checkpoint = str(tmp_path / 'crawl.sqlite')
+    crawler = DocumentationCrawler(site, requests_per_second=1000, use_sitemaps=False, checkpoint=checkpoint)
+    fetch_page = crawler._fetch_page
+
+    def dying_fetch(url):
+        if url.endswith('page1.html'):
+            raise SystemExit("killed")
+        return fetch_page(url)
+
+    crawler._fetch_page = dying_fetch
+    with pytest.raises(SystemExit):
+        crawler.crawl(site)
+
+    server.paths.clear()
+    resumed = DocumentationCrawler(site, requests_per_second=1000, use_sitemaps=False, checkpoint=checkpoint)
+    resumed.crawl(site)
+    resumed.discard_checkpoint()
+
+    # Pages done before the crash are not fetched again, and the result is that of a whole crawl
+    assert '/' not in server.paths and '/docs/' not in server.paths
+    assert '/docs/page1.html' in server.paths
+    complete = _crawl(site)
+    assert set(resumed.content_store) | resumed.duplicate_urls == set(complete.content_store) | complete.duplicate_urls
+    assert not os.path.exists(checkpoint)
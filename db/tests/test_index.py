@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag.index import InvertedIndex
+
+
+def _random_matrix(rng, n_docs, n_terms):
+    """Chunk x term matrix whose first terms occur in most chunks, as stop words do.
+
+    Weights are multiples of 1/8, so every sum is exact and equal scores
+    tie exactly, whichever order they were added in.
+    """
+    density = np.minimum(0.9, 2.0 / np.arange(1, n_terms + 1))
+    mask = rng.random((n_docs, n_terms)) < density
+    weights = rng.integers(1, 9, size=(n_docs, n_terms)) / 8
+    return sparse.csr_matrix(np.where(mask, weights, 0.0))
+
+
+def _random_query(rng, n_terms):
+    terms = rng.choice(n_terms, size=min(n_terms, rng.integers(1, 6)), replace=False)
+    weights = rng.integers(1, 9, size=len(terms)) / 8
+    return sparse.csr_matrix((weights, terms, [0, len(terms)]), shape=(1, n_terms))
+
+
+def _brute_force(vectors, query, k):
+    """Scores of every chunk, and the k best by score, ties by chunk index"""
+    scores = (vectors @ query.T).toarray().ravel()
+    return np.lexsort((np.arange(len(scores)), -scores))[:k], scores
+
+
+def _assert_same_top_k(docs, top_scores, expected, scores, k):
+    assert len(docs) == len(top_scores) == min(k, len(scores))
+    assert len(set(docs.tolist())) == len(docs)
+    np.testing.assert_array_equal(top_scores, scores[docs])
+    np.testing.assert_array_equal(top_scores, scores[expected])
+    # Chunks that score are ranked exactly; zero-score padding may be any unranked chunks
+    scored = scores[expected] > 0
+    np.testing.assert_array_equal(docs[scored], expected[scored])
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_top_k_matches_a_full_scan(seed):
+    rng = np.random.default_rng(seed)
+    n_docs, n_terms = int(rng.integers(1, 400)), int(rng.integers(1, 40))
+    vectors = _random_matrix(rng, n_docs, n_terms)
+    index = InvertedIndex(vectors)
+    queries = sparse.vstack([_random_query(rng, n_terms) for _ in range(5)], format='csr')
+
+    for k in (1, 3, 10):
+        batch = index.top_k_many(queries, k)
+        for row, (many_docs, many_scores) in enumerate(batch):
+            expected, scores = _brute_force(vectors, queries[row], k)
+            docs, top_scores = index.top_k(queries[row], k)
+            _assert_same_top_k(docs, top_scores, expected, scores, k)
+            _assert_same_top_k(many_docs, many_scores, expected, scores, k)
+
+
+def test_query_without_known_terms():
+    vectors = sparse.csr_matrix(np.eye(4))
+    docs, scores = InvertedIndex(vectors).top_k(sparse.csr_matrix((1, 4)), 2)
+    assert len(docs) == 2 and not scores.any()
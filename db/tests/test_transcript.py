@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag import transcript
+from docrag.transcript import TranscriptLog, read_transcript
+
+
+def test_waiting_turn_is_synced_without_a_later_turn(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(transcript.os, 'fsync', synced.append)
+    log = TranscriptLog(str(tmp_path / 'chat.jsonl'), fsync_every=8, fsync_interval=0.05)
+
+    log.append({'question': 'q', 'answer': 'a'})
+    assert synced == []
+    deadline = time.monotonic() + 5
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(synced) == 1
+
+    log.close()
+    assert list(read_transcript(log.path)) == [{'question': 'q', 'answer': 'a'}]
+
+
+def test_batched_sync_and_close(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(transcript.os, 'fsync', synced.append)
+    log = TranscriptLog(str(tmp_path / 'chat.jsonl'), fsync_every=3, fsync_interval=60)
+
+    for i in range(4):
+        log.append({'question': str(i), 'answer': 'a'})
+    assert len(synced) == 1
+    log.close()
+    assert len(synced) == 2
+    assert log._timer is None
+    assert [turn['question'] for turn in log] == ['0', '1', '2', '3']
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from docrag.urls import canonicalize_url, in_scope, resolve_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://Docs.Example.com:443/guide/', 'https://docs.example.com/guide'),
+    ('http://example.com:8080/a/./b/../c//d', 'http://example.com:8080/a/c/d'),
+    ('https://example.com/docs/index.html#install', 'https://example.com/docs'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com/page?utm_source=x&utm_medium=y&gclid=1&fbclid=2', 'https://example.com/page'),
+    ('https://example.com/list?page=2&utm_campaign=z', 'https://example.com/list?page=2'),
+    ('https://example.com/api?version=3&id=7', 'https://example.com/api?id=7&version=3'),
+    ('mailto:team@example.com', None),
+    ('javascript:void(0)', None),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_pages_told_apart_by_their_query_stay_apart():
+    pages = {canonicalize_url(f"https://example.com/changelog?page={n}&ref=nav") for n in range(1, 4)}
+    assert len(pages) == 3
+
+
+def test_query_denylist_replaces_the_default():
+    assert canonicalize_url('https://example.com/a?utm_source=x&lang=en', query_denylist=['lang']) == \
+        'https://example.com/a?utm_source=x'
+
+
+def test_relative_links():
+    assert canonicalize_url('../b.html', 'https://example.com/docs/a/') == 'https://example.com/docs/b.html'
+    assert resolve_url('page1.html#top', 'https://example.com/docs/') == 'https://example.com/docs/page1.html'
+    assert resolve_url('ftp://example.com/file') is None
+
+
+def test_in_scope():
+    assert in_scope('https://example.com/docs/a', 'https://example.com/docs')
+    assert in_scope('https://example.com/docs', 'https://example.com/docs')
+    assert not in_scope('https://example.com/docsearch', 'https://example.com/docs')
+    assert in_scope('https://example.com/anything', 'https://example.com/')
@@ -1,6 +1,10 @@
 # Add your utilities or helper functions to this file.
 
 import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
 from dotenv import load_dotenv, find_dotenv
 
 # these expect to find a .env file at the directory above the lesson.
@@ -38,4 +42,26 @@ def get_trello_token():
 def get_trello_board_id():
     load_env()
     trello_board_id = os.getenv("TRELLO_BOARD_ID")
-    return trello_board_id
\ No newline at end of file
+    return trello_board_id
+
+# (connect, read) seconds; a hung API fails the tool call instead of stalling the crew
+HTTP_TIMEOUT = (5, 30)
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """One requests session for every tool: pooled keep-alive connections, gzip,
+    and retries with jittered backoff on connection errors, 429 and 5xx"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            retry = Retry(total=3, backoff_factor=0.5, backoff_jitter=0.5,
+                          status_forcelist=(429, 500, 502, 503, 504),
+                          respect_retry_after_header=True, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retry)
+            _http_session = requests.Session()
+            _http_session.mount('https://', adapter)
+            _http_session.mount('http://', adapter)
+            _http_session.headers.update(make_headers(accept_encoding=True, keep_alive=True))
+        return _http_session
@@ -6,6 +6,7 @@ import yaml
 import json
 import os
 from helper import load_env, get_openai_api_key, get_base_url, get_trello_api_key, get_trello_token, get_trello_board_id
+from helper import get_http_session, HTTP_TIMEOUT
 from IPython.display import Markdown
 import warnings
 warnings.filterwarnings('ignore')
@@ -69,9 +70,12 @@ class BoardDataFetcherTool(BaseTool):
             'actions': 'commentCard'
         }
 
-        response = requests.get(url, params=query)
+        try:
+            response = get_http_session().get(url, params=query, timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            response = None
 
-        if response.status_code == 200:
+        if response is not None and response.status_code == 200:
             return response.json()
         else:
             # Fallback in case of timeouts or other issues
@@ -92,9 +96,12 @@ class CardDataFetcherTool(BaseTool):
             'key': self.api_key,
             'token': self.api_token
         }
-        response = requests.get(url, params=query)
+        try:
+            response = get_http_session().get(url, params=query, timeout=HTTP_TIMEOUT)
+        except requests.RequestException:
+            response = None
 
-        if response.status_code == 200:
+        if response is not None and response.status_code == 200:
             return response.json()
         else:
             # Fallback in case of timeouts or other issues